@@ -0,0 +1,3 @@
+@echo off
+cd %~dp0
+C:\Users\robot.ad\Desktop\robots\1t_otbasy\venv\Scripts\python.exe -i -m src.pipeline
\ No newline at end of file
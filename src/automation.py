@@ -0,0 +1,216 @@
+import os
+from dataclasses import dataclass
+from os.path import basename, dirname, join
+from time import monotonic, sleep
+from typing import Any, Callable, Iterable, Optional
+
+from src.config import CREDENTIALS, Credentials, PROCESS_PATH
+from src.logger import logger
+
+SETTLE_TIME = .5
+POLL_INTERVAL = .1
+WINDOW_TIMEOUT = 20
+CONFIRM_TIMEOUT = 5.
+EXPORT_TRIES = 3
+
+# The flow only relies on the part of pywinauto's Application / WindowSpecification it calls below:
+# app.window(title=, title_re=, found_index=, best_match=), app.kill(), app.process,
+# window.wait(), window.exists(), window.close(), window.send_keystrokes(), window[control],
+# control.set_text(), control.send_keystrokes(), control.select(), control.click(), control.is_checked()
+Application = Any
+WindowSpecification = Any
+
+
+@dataclass
+class Report:
+    mode: str
+    code: str
+    branch: str
+    file_path: str
+    date_ranges: tuple[str, str]
+    app: Optional[Application] = None
+
+
+@dataclass
+class DialogWait:
+    title: str
+    waited: float
+    settled: float
+
+
+def build_reports(branches: Iterable[str], reports_folder: str, date_ranges: tuple[str, str]) -> list[Report]:
+    reports = []
+    for branch in branches:
+        code = 'Z_160_PR_FORMOBWVEDZP'
+        reports.append(Report(mode='CRD', code=code, branch=branch, date_ranges=date_ranges,
+                              file_path=join(reports_folder, f'{code}_{branch}.xls')))
+
+    for position, code in enumerate(['Z_160_HREMPLOYTAKETOWORK', 'Z_160_SHTAT_RASTANOVKA_V', 'Z_160_DISEMPLOYEE'],
+                                    start=1):
+        reports.insert(position, Report(mode='PRS', code=code, branch='00', date_ranges=date_ranges,
+                                        file_path=join(reports_folder, f'{code}_00.xls')))
+    return reports
+
+
+class Automation:
+    def __init__(self, start: Callable[[str], Application], not_found_error: type[Exception],
+                 retry_errors: tuple[type[Exception], ...], register: Optional[Callable[[int], None]] = None,
+                 process_path: str = PROCESS_PATH, credentials: Credentials = CREDENTIALS,
+                 settle_time: float = SETTLE_TIME, poll_interval: float = POLL_INTERVAL,
+                 window_timeout: float = WINDOW_TIMEOUT, confirm_timeout: float = CONFIRM_TIMEOUT) -> None:
+        self.start = start
+        self.not_found_error = not_found_error
+        self.retry_errors = retry_errors
+        self.register = register
+        self.process_path = process_path
+        self.credentials = credentials
+        self.settle_time = settle_time
+        self.poll_interval = poll_interval
+        self.window_timeout = window_timeout
+        self.confirm_timeout = confirm_timeout
+        self.waits: list[DialogWait] = []
+
+    def get_window(self, app: Application, title: str, wait_for: str = 'exists', timeout: Optional[float] = None,
+                   regex: bool = False, found_index: int = 0) -> WindowSpecification:
+        start = monotonic()
+        window = app.window(title=title, found_index=found_index) \
+            if not regex else app.window(title_re=title, found_index=found_index)
+        window.wait(wait_for=wait_for, timeout=self.window_timeout if timeout is None else timeout,
+                    retry_interval=self.poll_interval)
+        waited = monotonic() - start
+        # Colvir ignores input for a moment after a dialog is drawn
+        sleep(self.settle_time)
+        self.waits.append(DialogWait(title=title, waited=waited, settled=monotonic() - start - waited))
+        return window
+
+    def choose_mode(self, app: Application, mode: str) -> None:
+        mode_win = app.window(title='Выбор режима')
+        mode_win['Edit2'].set_text(text=mode)
+        mode_win['Edit2'].send_keystrokes('~')
+
+    def login(self, app: Application) -> None:
+        login_win = app.window(title='Вход в систему')
+        login_win['Edit2'].set_text(text=self.credentials.user)
+        login_win['Edit'].set_text(text=self.credentials.password)
+        login_win['OK'].send_keystrokes('~')
+
+    def confirm(self, app: Application) -> None:
+        dialog = app.window(title='Colvir Banking System', found_index=0)
+        start = monotonic()
+        while not dialog.window(best_match='OK').exists():
+            if monotonic() - start >= self.confirm_timeout:
+                raise self.not_found_error
+            sleep(self.poll_interval)
+        dialog.send_keystrokes('~')
+
+    def check_interactivity(self, app: Application) -> None:
+        self.choose_mode(app=app, mode='EXTRCT')
+        if (filter_win := app.window(title='Фильтр')).exists():
+            filter_win.close()
+        else:
+            raise self.not_found_error
+
+    def open_colvir(self, max_tries: int = 10) -> Application:
+        retry_count: int = 0
+        app = None
+        while retry_count < max_tries:
+            try:
+                app = self.start(self.process_path)
+                if self.register is not None:
+                    self.register(app.process)
+                self.login(app=app)
+                self.confirm(app=app)
+                self.check_interactivity(app=app)
+                break
+            except self.not_found_error:
+                retry_count += 1
+                if app:
+                    app.kill()
+                continue
+        if retry_count == max_tries:
+            raise Exception('max_retries exceeded')
+        return app
+
+    def filter_reports(self, app: Application, report_code: str) -> None:
+        report_win = self.get_window(app=app, title='Выбор отчета')
+        report_win.send_keystrokes('{F9}')
+
+        report_filter_win = self.get_window(app=app, title='Фильтр')
+        report_filter_win['Edit4'].set_text(text=report_code)
+        report_filter_win['OK'].send_keystrokes('~')
+
+    def fill_file_form(self, app: Application, report: Report) -> None:
+        directory = dirname(report.file_path)
+        file_name = basename(report.file_path)
+
+        os.makedirs(directory, exist_ok=True)
+        report_win = self.get_window(app=app, title='Выбор отчета')
+        file_win = app.window(title='Файл отчета ')
+        while not file_win.exists():
+            report_win['Экспорт в файл...'].send_keystrokes('~')
+            sleep(self.settle_time)
+
+        file_win['Edit4'].set_text(file_name)
+        file_win['Edit2'].set_text(directory)
+        file_win['ComboBox'].select(11)
+        file_win['OK'].send_keystrokes('~')
+
+        params_win = self.get_window(app=app, title='Параметры отчета ')
+
+        start_date, end_date = report.date_ranges
+
+        if 'Z_160_PR_FORMOBWVEDZP' in file_name:
+            params_win['Edit2'].set_text(report.branch)
+            params_win['Edit4'].set_text(start_date)
+            params_win['Edit6'].set_text(end_date)
+            params_win['Edit8'].set_text('Ш')
+        elif 'Z_160_SHTAT_RASTANOVKA_V' in file_name:
+            params_win['Edit2'].set_text(report.branch)
+            params_win['Edit4'].set_text(end_date)
+        elif 'Z_160_HREMPLOYTAKETOWORK' in file_name:
+            params_win['Edit2'].set_text(report.branch)
+            params_win['Edit4'].set_text(start_date)
+            params_win['Edit6'].set_text(end_date)
+        elif 'Z_160_DISEMPLOYEE' in file_name:
+            params_win['Edit2'].set_text(start_date)
+            params_win['Edit4'].set_text(end_date)
+            params_win['Edit6'].set_text(report.branch)
+        params_win['OK'].send_keystrokes('~')
+
+    def export_report(self, report: Report) -> None:
+        app = self.open_colvir()
+        # The session belongs to the report from the start, so a failed export can still be killed
+        report.app = app
+        self.choose_mode(app=app, mode=report.mode)
+
+        filter_win_title = 'PRS_GR4' if report.mode == 'PRS' else 'Фильтр'
+        mode_filter_win = self.get_window(app=app, title=filter_win_title)
+        mode_filter_win['OK'].send_keystrokes('~')
+
+        main_win_title = 'Персонал (зарплата)' if report.mode == 'CRD' else 'Персонал'
+        main_win = self.get_window(app=app, title=main_win_title)
+        main_win.send_keystrokes('{F5}')
+
+        report_win = self.get_window(app=app, title='Выбор отчета')
+        self.filter_reports(app=app, report_code=report.code)
+
+        while (preview_checkbox := report_win['Предварительный просмотр']).is_checked():
+            preview_checkbox.click()
+
+        self.fill_file_form(app=app, report=report)
+
+    def export(self, report: Report, max_tries: int = EXPORT_TRIES) -> None:
+        tries = 0
+        while True:
+            try:
+                self.export_report(report=report)
+                return
+            except self.retry_errors as error:
+                tries += 1
+                logger.warning(f'Export of {basename(report.file_path)} failed ({type(error).__name__}), '
+                               f'attempt {tries}')
+                if report.app is not None:
+                    report.app.kill()
+                    report.app = None
+                if tries >= max_tries:
+                    raise
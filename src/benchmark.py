@@ -0,0 +1,281 @@
+import argparse
+import os
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass
+from os.path import exists, join
+from time import perf_counter
+from typing import Callable
+
+import openpyxl
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+from src import serialization
+from src.automation import Automation, DialogWait, build_reports
+from src.config import BRANCH_MAPPINGS, Credentials
+from src.fake_colvir import ElementNotFoundError, FakeColvir, Script, WaitTimeoutError
+from src.json_lines import read_rows, tee_rows
+from src.parser import (Report, get_json_path, get_merged_rows, is_row_empty, iter_data_rows, iter_report_rows,
+                        parse_headers, parse_report, task_1t)
+from src.serialization import PayrollRow
+from src.synthetic import generate_report
+
+REPORT_NAMES = ['Z_160_SHTAT_RASTANOVKA_V_00', 'Z_160_DISEMPLOYEE_00',
+                'Z_160_HREMPLOYTAKETOWORK_00', 'Z_160_PR_FORMOBWVEDZP_18', 'Z_160_PR_FORMOBWVEDZP_00']
+# Workbooks are generated and loaded in memory, 1M rows takes several GB per report and has to be asked for
+SIZES = [1_000, 10_000, 100_000]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rows: int
+    seconds: float
+    peak_memory: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.
+
+    def __str__(self) -> str:
+        return (f'{self.name:<45} {self.rows:>10} rows {self.seconds:>10.3f} s '
+                f'{self.rows_per_second:>12.0f} rows/s {self.peak_memory / 2 ** 20:>10.1f} MiB')
+
+
+def measure(func: Callable[[], int], name: str, trace_memory: bool = False) -> BenchmarkResult:
+    if trace_memory:
+        tracemalloc.start()
+    start = perf_counter()
+    rows = func()
+    seconds = perf_counter() - start
+    peak_memory = 0
+    if trace_memory:
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return BenchmarkResult(name=name, rows=rows, seconds=seconds, peak_memory=peak_memory)
+
+
+def get_fixture(report_name: str, rows: int, fixtures_folder: str) -> str:
+    folder = join(fixtures_folder, str(rows))
+    if not exists(join(folder, f'{report_name}.xlsx')):
+        generate_report(report_name=report_name, rows=rows, folder=folder)
+    return folder
+
+
+def bench_parse(report_name: str, rows: int, fixtures_folder: str, json_folder: str,
+                trace_memory: bool = False) -> BenchmarkResult:
+    reports_folder = get_fixture(report_name=report_name, rows=rows, fixtures_folder=fixtures_folder)
+    report = Report(report_name=report_name)
+    return measure(func=lambda: parse_report(report=report, reports_folder=reports_folder, json_folder=json_folder),
+                   name=f'parse_report[{report_name}]', trace_memory=trace_memory)
+
+
+def bench_task_1t(rows: int, fixtures_folder: str, json_folder: str, trace_memory: bool = False) -> BenchmarkResult:
+    report = Report(report_name='Z_160_PR_FORMOBWVEDZP_18')
+    reports_folder = get_fixture(report_name=report.report_name, rows=rows, fixtures_folder=fixtures_folder)
+    parse_report(report=report, reports_folder=reports_folder, json_folder=json_folder)
+    file_path = get_json_path(report=report, json_folder=json_folder)
+
+    def aggregate() -> int:
+        task_1t(rows=read_rows(file_path, PayrollRow))
+        return rows
+
+    return measure(func=aggregate, name='task_1t', trace_memory=trace_memory)
+
+
+def bench_pipeline(rows: int, fixtures_folder: str, json_folder: str, trace_memory: bool = False) -> BenchmarkResult:
+    report = Report(report_name='Z_160_PR_FORMOBWVEDZP_18')
+    reports_folder = get_fixture(report_name=report.report_name, rows=rows, fixtures_folder=fixtures_folder)
+    file_path = get_json_path(report=report, json_folder=json_folder, compress=True)
+
+    def parse_and_aggregate() -> int:
+        rows_ = tee_rows(file_path=file_path, rows=iter_report_rows(report=report, reports_folder=reports_folder))
+        task_1t(rows=(serialization.convert(row, PayrollRow) for row in rows_))
+        return rows
+
+    return measure(func=parse_and_aggregate, name='parse_report + task_1t (pipelined, gzip)',
+                   trace_memory=trace_memory)
+
+
+def bench_serialization(file_path: str) -> list[BenchmarkResult]:
+    rows = list(read_rows(file_path))
+    results = []
+    default_backend = serialization.BACKEND
+    try:
+        for backend in serialization.BACKENDS:
+            serialization.set_backend(backend)
+            lines = [serialization.dumps(row) for row in rows]
+            results.append(measure(func=lambda: len([serialization.dumps(row) for row in rows]),
+                                   name=f'encode[{backend}]'))
+            results.append(measure(func=lambda: len([serialization.loads(line) for line in lines]),
+                                   name=f'decode[{backend}]'))
+            results.append(measure(func=lambda: len([serialization.loads(line, PayrollRow) for line in lines]),
+                                   name=f'decode[{backend}, PayrollRow]'))
+    finally:
+        serialization.set_backend(default_backend)
+    return results
+
+
+def legacy_row_scan(sheet: Worksheet, data_idx: int) -> int:
+    # Row loop as it was before the per-sheet index: full-width Cell rows and MultiCellRange lookups
+    merged_cells = sheet.merged_cells
+    data_rows = 0
+    for row in sheet.iter_rows(min_row=data_idx):
+        if all(not (bool(value.strip()) if isinstance(value := cell.value, str) else bool(value)) for cell in row):
+            continue
+        if merged_cells and row[0].coordinate in merged_cells:
+            continue
+        data_rows += 1
+    return data_rows
+
+
+def indexed_row_scan(sheet: Worksheet, data_idx: int, headers: list[str]) -> int:
+    merged_rows = get_merged_rows(sheet=sheet)
+    data_rows = 0
+    for row_idx, row in iter_data_rows(sheet=sheet, data_idx=data_idx, headers=headers):
+        if is_row_empty(row):
+            continue
+        if row_idx in merged_rows:
+            continue
+        data_rows += 1
+    return data_rows
+
+
+def bench_row_scan(report_name: str, rows: int, fixtures_folder: str) -> list[BenchmarkResult]:
+    reports_folder = get_fixture(report_name=report_name, rows=rows, fixtures_folder=fixtures_folder)
+    report = Report(report_name=report_name)
+    workbook: Workbook = openpyxl.load_workbook(join(reports_folder, f'{report_name}.xlsx'))
+    sheet: Worksheet = workbook.active
+    headers = parse_headers(sheet=sheet, headers_idx=report.headers_idx, subheaders_exist=report.subheaders_exist)
+    return [
+        measure(func=lambda: legacy_row_scan(sheet=sheet, data_idx=report.data_idx),
+                name=f'row_scan[{report_name}] before'),
+        measure(func=lambda: indexed_row_scan(sheet=sheet, data_idx=report.data_idx, headers=headers),
+                name=f'row_scan[{report_name}] after'),
+    ]
+
+
+def bench_colvir_export(branches: list[str], reports_folder: str, script: Script,
+                        settle_time: float) -> tuple[BenchmarkResult, list[DialogWait], dict[str, list[float]]]:
+    colvir = FakeColvir(script=script)
+    automation = Automation(start=colvir.start, not_found_error=ElementNotFoundError,
+                            retry_errors=(ElementNotFoundError, WaitTimeoutError), process_path='COLVIR.EXE',
+                            credentials=Credentials(user='robot', password='robot'), settle_time=settle_time,
+                            window_timeout=script.find_timeout, confirm_timeout=script.find_timeout)
+    reports = build_reports(branches=branches, reports_folder=reports_folder, date_ranges=('01.07.2026', '30.09.2026'))
+
+    def export_all() -> int:
+        for report in reports:
+            try:
+                automation.export(report=report)
+            except automation.retry_errors as error:
+                print(f'Export of {report.code}_{report.branch} failed: {error!r}')
+        colvir.join()
+        for report in reports:
+            if report.app is not None:
+                report.app.kill()
+        return len(reports)
+
+    result = measure(func=export_all, name=f'colvir export[settle={settle_time:g}s]')
+    result.name = f'{result.name[:-1]}, {sum(colvir.failures.values())} injected failures]'
+    return result, automation.waits, colvir.lags
+
+
+def format_dialog_waits(waits: list[DialogWait], lags: dict[str, list[float]]) -> list[str]:
+    # Overhead is the time spent after the dialog was already drawn: polling lag plus the settle pause
+    waits_by_title: dict[str, list[DialogWait]] = defaultdict(list)
+    for wait in waits:
+        waits_by_title[wait.title].append(wait)
+
+    lines = [f'{"dialog":<25} {"waits":>6} {"waited":>9} {"poll lag":>9} {"settled":>9} {"overhead":>9}']
+    for title, title_waits in waits_by_title.items():
+        waited = sum(wait.waited for wait in title_waits)
+        settled = sum(wait.settled for wait in title_waits)
+        lag = sum(lags.get(title, []))
+        lines.append(f'{title.strip():<25} {len(title_waits):>6} {waited:>8.2f}s {lag:>8.2f}s {settled:>8.2f}s '
+                     f'{lag + settled:>8.2f}s')
+    return lines
+
+
+def run_colvir(branches: list[str], settle_times: list[float], script: Script) -> list[BenchmarkResult]:
+    results = []
+    with tempfile.TemporaryDirectory() as reports_folder:
+        for settle_time in settle_times:
+            result, waits, lags = bench_colvir_export(branches=branches, reports_folder=reports_folder,
+                                                      script=script, settle_time=settle_time)
+            print(result)
+            for line in format_dialog_waits(waits=waits, lags=lags):
+                print(f'    {line}')
+            results.append(result)
+    return results
+
+
+def parse_failure_rate(value: str) -> tuple[str, float]:
+    title, rate = value.rsplit('=', 1)
+    return title, float(rate)
+
+
+def run(sizes: list[int], report_names: list[str], fixtures_folder: str, trace_memory: bool = False,
+        row_scan: bool = False) -> list[BenchmarkResult]:
+    results = []
+    with tempfile.TemporaryDirectory() as json_folder:
+        for rows in sizes:
+            if row_scan:
+                for report_name in report_names:
+                    for result in bench_row_scan(report_name=report_name, rows=rows, fixtures_folder=fixtures_folder):
+                        print(result)
+                        results.append(result)
+            for report_name in report_names:
+                result = bench_parse(report_name=report_name, rows=rows, fixtures_folder=fixtures_folder,
+                                     json_folder=json_folder, trace_memory=trace_memory)
+                print(result)
+                results.append(result)
+            for bench in (bench_task_1t, bench_pipeline):
+                result = bench(rows=rows, fixtures_folder=fixtures_folder, json_folder=json_folder,
+                               trace_memory=trace_memory)
+                print(result)
+                results.append(result)
+    return results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Benchmarks parser and 1-T aggregation on synthetic reports')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                            help='Rows per report, e.g. --sizes 1000000 for the 1M run')
+    arg_parser.add_argument('--reports', nargs='+', default=REPORT_NAMES, choices=REPORT_NAMES)
+    arg_parser.add_argument('--fixtures', default=join(tempfile.gettempdir(), '1t_otbasy_fixtures'),
+                            help='Folder to cache generated workbooks in')
+    arg_parser.add_argument('--memory', action='store_true', help='Trace peak memory (slows down the run)')
+    arg_parser.add_argument('--payroll', help='Payroll .json/.jsonl file to benchmark JSON encode/decode on')
+    arg_parser.add_argument('--row-scan', action='store_true',
+                            help='Compare the row scan before and after the per-sheet index')
+    arg_parser.add_argument('--colvir', action='store_true', help='Replay the Colvir export against a fake client')
+    arg_parser.add_argument('--branches', nargs='+',
+                            default=[branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS])
+    arg_parser.add_argument('--settle', type=float, nargs='+', default=[.5, .1],
+                            help='Pause after each dialog is drawn, one replay per value')
+    arg_parser.add_argument('--latency', type=float, default=.05, help='Seconds a dialog takes to appear')
+    arg_parser.add_argument('--export-time', type=float, default=.5, help='Seconds Colvir takes to write a file')
+    arg_parser.add_argument('--fail', type=parse_failure_rate, action='append', default=[], metavar='DIALOG=RATE',
+                            help="Probability that a dialog never appears, e.g. 'Colvir Banking System=0.1'")
+    args = arg_parser.parse_args()
+
+    if args.colvir:
+        script = Script(default_latency=args.latency, failure_rates=dict(args.fail), export_time=args.export_time,
+                        find_timeout=1., exists_timeout=.1)
+        run_colvir(branches=args.branches, settle_times=args.settle, script=script)
+        return
+
+    os.makedirs(args.fixtures, exist_ok=True)
+    if args.payroll:
+        for result in bench_serialization(file_path=args.payroll):
+            print(result)
+        return
+    run(sizes=args.sizes, report_names=args.reports, fixtures_folder=args.fixtures, trace_memory=args.memory,
+        row_scan=args.row_scan)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,8 +28,14 @@ CREDENTIALS = Credentials(user=os.getenv('COLVIR_USR'), password=os.getenv('COLV
 BOT = TelegramBot(token=os.getenv('TOKEN'), chat_id=os.getenv('CHAT_ID'))
 
 PROJECT_FOLDER = dirname(abspath(''))
+PIDS_FOLDER = join(ROOT_FOLDER, 'pids')
+KEYS_MANIFEST = join(ROOT_FOLDER, 'cache', 'keys_manifest.json')
+SNAPSHOTS_FOLDER = join(ROOT_FOLDER, 'snapshots')
 
 date_helper = date_utils.DateHelper(today=datetime.now())
 REPORTS_FOLDER = join(PROJECT_FOLDER, 'reports', date_helper.get_prev_quarter_str_name())
 JSON_FOLDER = join(PROJECT_FOLDER, 'json', date_helper.get_prev_quarter_str_name())
+BEFORE_PREV_JSON_FOLDER = join(PROJECT_FOLDER, 'json', date_helper.get_before_prev_quarter_str_name())
 PREV_QUARTER_DATE_RANGES = date_helper.get_prev_quarter_date_ranges()
+SNAPSHOT_PATH = join(SNAPSHOTS_FOLDER, f'{date_helper.get_prev_quarter_str_name()}.json')
+BEFORE_PREV_SNAPSHOT_PATH = join(SNAPSHOTS_FOLDER, f'{date_helper.get_before_prev_quarter_str_name()}.json')
@@ -17,6 +17,11 @@ class DateHelper:
         quarter, year = self.get_prev_quarter_data()
         return f'{quarter} квартал {year}'
 
+    def get_before_prev_quarter_str_name(self) -> str:
+        quarter, year = self.get_prev_quarter_data()
+        quarter, year = (quarter - 1, year) if quarter > 1 else (4, year - 1)
+        return f'{quarter} квартал {year}'
+
     @staticmethod
     def get_last_day(year: int, month: int) -> int:
         _, last_day = calendar.monthrange(year, month)
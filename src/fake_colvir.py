@@ -0,0 +1,219 @@
+import random
+import re
+import threading
+from dataclasses import dataclass, field
+from os.path import join
+from time import monotonic, sleep
+from typing import Optional
+
+MAIN_WINDOW_TITLES = {'CRD': 'Персонал (зарплата)', 'PRS': 'Персонал'}
+
+
+class ElementNotFoundError(Exception):
+    pass
+
+
+class WaitTimeoutError(Exception):
+    pass
+
+
+@dataclass
+class Script:
+    # Seconds between the action that opens a dialog and the dialog being drawn
+    latencies: dict[str, float] = field(default_factory=dict)
+    default_latency: float = .05
+    # Probability that a dialog never shows up, e.g. a login that hangs
+    failure_rates: dict[str, float] = field(default_factory=dict)
+    export_time: float = .5
+    file_size: int = 256 * 1024
+    # pywinauto's Timings.window_find_timeout and Timings.exists_timeout
+    find_timeout: float = 5.
+    exists_timeout: float = .5
+    seed: int = 0
+
+    def get_latency(self, title: str) -> float:
+        return self.latencies.get(title, self.default_latency)
+
+
+@dataclass
+class Dialog:
+    title: str
+    ready_at: float
+    context: str = ''
+    texts: dict[str, str] = field(default_factory=dict)
+    checked: dict[str, bool] = field(default_factory=dict)
+
+
+class FakeColvir:
+    def __init__(self, script: Optional[Script] = None) -> None:
+        self.script = script or Script()
+        self.random = random.Random(self.script.seed)
+        self.lock = threading.Lock()
+        self.apps: list[FakeApp] = []
+        self.writers: list[threading.Thread] = []
+        self.failures: dict[str, int] = {}
+        # Time between a dialog being drawn and a wait on it returning, by title
+        self.lags: dict[str, list[float]] = {}
+
+    def start(self, cmd_line: str) -> 'FakeApp':
+        with self.lock:
+            app = FakeApp(colvir=self, process=10_000 + len(self.apps))
+            self.apps.append(app)
+        self.open(app=app, title='Вход в систему')
+        return app
+
+    def open(self, app: 'FakeApp', title: str, **kwargs) -> None:
+        with self.lock:
+            if (rate := self.script.failure_rates.get(title)) and self.random.random() < rate:
+                self.failures[title] = self.failures.get(title, 0) + 1
+                return
+            app.dialogs[title] = Dialog(title=title, ready_at=monotonic() + self.script.get_latency(title), **kwargs)
+
+    def handle(self, app: 'FakeApp', dialog: Dialog, control: Optional[str], keys: str) -> None:
+        title = dialog.title
+        if title == 'Вход в систему' and control == 'OK':
+            app.close(title)
+            self.open(app=app, title='Colvir Banking System')
+        elif title == 'Colvir Banking System' and control is None:
+            app.close(title)
+            self.open(app=app, title='Выбор режима')
+        elif title == 'Выбор режима' and control == 'Edit2' and keys == '~':
+            app.mode = dialog.texts.get('Edit2', '')
+            self.open(app=app, title='PRS_GR4' if app.mode == 'PRS' else 'Фильтр', context='mode')
+        elif title in ('Фильтр', 'PRS_GR4') and control == 'OK':
+            app.close(title)
+            if dialog.context == 'mode' and app.mode in MAIN_WINDOW_TITLES:
+                self.open(app=app, title=MAIN_WINDOW_TITLES[app.mode])
+        elif title in MAIN_WINDOW_TITLES.values() and keys == '{F5}':
+            self.open(app=app, title='Выбор отчета', checked={'Предварительный просмотр': True})
+        elif title == 'Выбор отчета' and control is None and keys == '{F9}':
+            self.open(app=app, title='Фильтр', context='report')
+        elif title == 'Выбор отчета' and control == 'Экспорт в файл...':
+            if 'Файл отчета ' not in app.dialogs:
+                self.open(app=app, title='Файл отчета ')
+        elif title == 'Файл отчета ' and control == 'OK':
+            app.close(title)
+            app.file_path = join(dialog.texts['Edit2'], dialog.texts['Edit4'])
+            self.open(app=app, title='Параметры отчета ')
+        elif title == 'Параметры отчета ' and control == 'OK':
+            app.close(title)
+            writer = threading.Thread(target=self.write_file, args=(app.file_path,), daemon=True)
+            with self.lock:
+                self.writers.append(writer)
+            writer.start()
+
+    def write_file(self, file_path: str, chunks: int = 10) -> None:
+        # The file grows while Colvir writes it, like a real export
+        chunk = b'\0' * (self.script.file_size // chunks)
+        with open(file_path, 'wb') as f:
+            for _ in range(chunks):
+                sleep(self.script.export_time / chunks)
+                f.write(chunk)
+                f.flush()
+
+    def join(self) -> None:
+        for writer in list(self.writers):
+            writer.join()
+
+
+class FakeApp:
+    def __init__(self, colvir: FakeColvir, process: int) -> None:
+        self.colvir = colvir
+        self.process = process
+        self.dialogs: dict[str, Dialog] = {}
+        self.mode = ''
+        self.file_path = ''
+        self.killed = False
+
+    def window(self, title: Optional[str] = None, title_re: Optional[str] = None, found_index: int = 0,
+               **kwargs) -> 'FakeWindow':
+        return FakeWindow(app=self, title=title, title_re=title_re)
+
+    def close(self, title: str) -> None:
+        self.dialogs.pop(title, None)
+
+    def kill(self) -> None:
+        self.killed = True
+        self.dialogs.clear()
+
+
+class FakeWindow:
+    def __init__(self, app: FakeApp, title: Optional[str], title_re: Optional[str] = None) -> None:
+        self.app = app
+        self.title = title
+        self.title_re = title_re
+
+    def find(self) -> Optional[Dialog]:
+        if self.app.killed:
+            return None
+        now = monotonic()
+        for dialog in list(self.app.dialogs.values()):
+            if self.title_re is not None and not re.match(self.title_re, dialog.title):
+                continue
+            if self.title_re is None and dialog.title != self.title:
+                continue
+            if dialog.ready_at <= now:
+                return dialog
+        return None
+
+    def poll(self, timeout: float, retry_interval: float = .09) -> Optional[Dialog]:
+        start = monotonic()
+        while (dialog := self.find()) is None and monotonic() - start < timeout:
+            sleep(retry_interval)
+        return dialog
+
+    def get_dialog(self) -> Dialog:
+        if (dialog := self.poll(timeout=self.app.colvir.script.find_timeout)) is None:
+            raise ElementNotFoundError(self.title or self.title_re)
+        return dialog
+
+    def exists(self, timeout: Optional[float] = None) -> bool:
+        return self.poll(timeout=self.app.colvir.script.exists_timeout if timeout is None else timeout) is not None
+
+    def wait(self, wait_for: str = 'exists', timeout: Optional[float] = None,
+             retry_interval: Optional[float] = None) -> 'FakeWindow':
+        timeout = self.app.colvir.script.find_timeout if timeout is None else timeout
+        start = monotonic()
+        if (dialog := self.poll(timeout=timeout, retry_interval=retry_interval or .09)) is None:
+            raise WaitTimeoutError(f'{self.title or self.title_re} did not appear in {timeout}s')
+        with self.app.colvir.lock:
+            self.app.colvir.lags.setdefault(dialog.title, []).append(monotonic() - max(start, dialog.ready_at))
+        return self
+
+    def window(self, best_match: str = '', **kwargs) -> 'FakeControl':
+        return FakeControl(window=self, name=best_match)
+
+    def close(self) -> None:
+        self.app.close(self.get_dialog().title)
+
+    def send_keystrokes(self, keys: str) -> None:
+        self.app.colvir.handle(app=self.app, dialog=self.get_dialog(), control=None, keys=keys)
+
+    def __getitem__(self, name: str) -> 'FakeControl':
+        return FakeControl(window=self, name=name)
+
+
+class FakeControl:
+    def __init__(self, window: FakeWindow, name: str) -> None:
+        self.window = window
+        self.name = name
+
+    def exists(self, timeout: Optional[float] = None) -> bool:
+        return self.window.exists(timeout=timeout)
+
+    def set_text(self, text: str) -> None:
+        self.window.get_dialog().texts[self.name] = text
+
+    def select(self, item: int) -> None:
+        self.window.get_dialog().texts[self.name] = str(item)
+
+    def send_keystrokes(self, keys: str) -> None:
+        self.window.app.colvir.handle(app=self.window.app, dialog=self.window.get_dialog(), control=self.name,
+                                      keys=keys)
+
+    def click(self) -> None:
+        dialog = self.window.get_dialog()
+        dialog.checked[self.name] = not dialog.checked.get(self.name, False)
+
+    def is_checked(self) -> bool:
+        return self.window.get_dialog().checked.get(self.name, False)
@@ -0,0 +1,81 @@
+import gzip
+from contextlib import ExitStack
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, Type
+
+from src import serialization
+
+Row = dict[str, Any]
+
+TMP_SUFFIX = '.tmp'
+
+
+def get_tmp_path(file_path: str) -> str:
+    return f'{file_path}{TMP_SUFFIX}'
+
+
+def open_file(file_path: str, mode: str) -> IO[bytes]:
+    # A temporary file is compressed like the file it replaces
+    if file_path.removesuffix(TMP_SUFFIX).endswith('.gz'):
+        return gzip.open(file_path, f'{mode}b', compresslevel=6)
+    return open(file_path, f'{mode}b')
+
+
+class JsonLinesWriter:
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self.count = 0
+        self.file: Optional[IO[bytes]] = None
+
+    def __enter__(self) -> 'JsonLinesWriter':
+        self.file = open_file(file_path=self.file_path, mode='w')
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.file.close()
+        self.file = None
+
+    def write(self, row: Row) -> None:
+        self.file.write(serialization.dumps(row) + b'\n')
+        self.count += 1
+
+
+def write_rows(file_path: str, rows: Iterable[Row]) -> int:
+    with JsonLinesWriter(file_path=file_path) as writer:
+        for row in rows:
+            writer.write(row)
+    return writer.count
+
+
+def write_rows_by_key(rows: Iterable[Row], key: str, get_file_path: Callable[[Any], str]) -> dict[Any, int]:
+    writers: dict[Any, JsonLinesWriter] = {}
+    with ExitStack() as stack:
+        for row in rows:
+            value = row[key]
+            if (writer := writers.get(value)) is None:
+                writer = writers[value] = stack.enter_context(JsonLinesWriter(file_path=get_file_path(value)))
+            writer.write(row)
+    return {value: writer.count for value, writer in writers.items()}
+
+
+def tee_rows(file_path: str, rows: Iterable[Row]) -> Iterator[Row]:
+    with JsonLinesWriter(file_path=file_path) as writer:
+        for row in rows:
+            writer.write(row)
+            yield row
+
+
+def read_rows(file_path: str, type_: Optional[Type] = None) -> Iterator[Any]:
+    if file_path.endswith('.json'):
+        with open(file_path, 'rb') as f:
+            rows = serialization.loads(f.read())
+        if type_ is None:
+            yield from rows
+        else:
+            for row in rows:
+                yield serialization.convert(row, type_)
+        return
+
+    with open_file(file_path=file_path, mode='r') as f:
+        for line in f:
+            if line.strip():
+                yield serialization.loads(line, type_)
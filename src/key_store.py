@@ -0,0 +1,109 @@
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from os.path import join
+from typing import Iterable, Optional, Union
+
+from src.config import BASE_PATH, BRANCH_MAPPINGS, KEYS_MANIFEST
+from src.logger import logger
+
+
+@dataclass
+class EdsKey:
+    branch: str
+    password: str
+    path: str
+    mtime: float = 0.
+
+
+@dataclass
+class KeyStore:
+    keys: dict[str, EdsKey] = field(default_factory=dict)
+    problems: dict[str, str] = field(default_factory=dict)
+
+    def resolve(self, branch: str) -> EdsKey:
+        if (key := self.keys.get(branch)) is None:
+            raise KeyError(self.problems.get(branch, f'No EDS key for branch {branch}'))
+        return key
+
+
+def list_entries(folder: str, dirs: bool) -> list[os.DirEntry]:
+    with os.scandir(folder) as entries:
+        return sorted((entry for entry in entries if entry.is_dir() == dirs), key=lambda entry: entry.name)
+
+
+def scan_branch(branch_entry: os.DirEntry) -> Union[EdsKey, str]:
+    branch = branch_entry.name
+    password_entries = list_entries(folder=branch_entry.path, dirs=True)
+    if not password_entries:
+        return f'No password folder in {branch_entry.path}'
+    if len(password_entries) > 1:
+        return f'Several password folders in {branch_entry.path}: {[entry.name for entry in password_entries]}'
+
+    # The password is the folder name, the folder holds the key file (AUTH key preferred over GOST)
+    password_entry = password_entries[0]
+    key_entries = list_entries(folder=password_entry.path, dirs=False)
+    if len(key_entries) > 1:
+        key_entries = [entry for entry in key_entries if entry.name.upper().startswith('AUTH')] or key_entries
+    if not key_entries:
+        return f'No key file in {password_entry.path}'
+    if len(key_entries) > 1:
+        return f'Several key files in {password_entry.path}: {[entry.name for entry in key_entries]}'
+
+    return EdsKey(branch=branch, password=password_entry.name, path=key_entries[0].path,
+                  mtime=branch_entry.stat().st_mtime)
+
+
+def read_manifest(manifest_path: str, base_path: str) -> dict[str, EdsKey]:
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('base_path') != base_path:
+        return {}
+    return {branch: EdsKey(**key) for branch, key in manifest['keys'].items()}
+
+
+def write_manifest(manifest_path: str, base_path: str, keys: dict[str, EdsKey]) -> None:
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump({'base_path': base_path, 'keys': {branch: asdict(key) for branch, key in keys.items()}},
+                  f, ensure_ascii=False, indent=4)
+
+
+def load_key_store(base_path: str = BASE_PATH, branches: Optional[Iterable[str]] = None,
+                   manifest_path: Optional[str] = KEYS_MANIFEST) -> KeyStore:
+    if branches is None:
+        branches = [branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS]
+
+    cached_keys = read_manifest(manifest_path=manifest_path, base_path=base_path) if manifest_path else {}
+
+    # A single listing of the share; on Windows the entries already carry the folder mtimes
+    branch_entries = {entry.name: entry for entry in list_entries(folder=base_path, dirs=True)}
+
+    key_store = KeyStore()
+    for branch in branches:
+        if (branch_entry := branch_entries.get(branch)) is None:
+            key_store.problems[branch] = f'No key folder {join(base_path, branch)}'
+            continue
+
+        # Swapping the key file inside the password folder leaves the branch folder mtime as it was
+        cached_key = cached_keys.get(branch)
+        if cached_key is not None and cached_key.mtime == branch_entry.stat().st_mtime \
+                and os.path.exists(cached_key.path):
+            key_store.keys[branch] = cached_key
+            continue
+
+        key = scan_branch(branch_entry=branch_entry)
+        if isinstance(key, str):
+            key_store.problems[branch] = key
+        else:
+            key_store.keys[branch] = key
+
+    for problem in key_store.problems.values():
+        logger.error(problem)
+
+    if manifest_path:
+        write_manifest(manifest_path=manifest_path, base_path=base_path, keys=key_store.keys)
+    return key_store
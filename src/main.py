@@ -1,8 +1,5 @@
 import logging
-from os import listdir
-from os.path import join
 from time import sleep
-from typing import Any, Dict
 
 import requests
 from selenium import webdriver
@@ -14,32 +11,32 @@ from selenium.webdriver.support.ui import WebDriverWait
 from tqdm import tqdm
 from webdriver_manager.chrome import ChromeDriverManager
 
-from src.config import BASE_PATH, BRANCH_MAPPINGS
+from src import processes, serialization
+from src.config import BRANCH_MAPPINGS
+from src.key_store import EdsKey, load_key_store
 from src.logger import logger
+from src.processes import REGISTRY
+from src.serialization import CabinetReports
+from src.snapshot import Snapshot, update_snapshot
 from src.utils import get_app
 
 
 WAIT_TIME = 10
 
 
-def sign_auth(branch: str) -> None:
-    password_folder = join(BASE_PATH, branch)
-    logger.info(f'password_folder: {password_folder}')
-
-    password = listdir(password_folder)[0]
-    logger.info(f'password: {password}')
-    auth_key_path = join(password_folder, password, listdir(join(password_folder, password))[0])
+def sign_auth(key: EdsKey) -> None:
+    logger.info(f'auth_key_path: {key.path}')
 
     choose_auth_app = get_app(title='Открыть файл')
-    choose_auth_app.top_window().type_keys(f'{auth_key_path}~', with_spaces=True)
+    choose_auth_app.top_window().type_keys(f'{key.path}~', with_spaces=True)
 
     password_app = get_app(title='Формирование ЭЦП в формате CMS')
-    password_app.top_window().type_keys(f'{password}~')
+    password_app.top_window().type_keys(f'{key.password}~')
     sleep(.5)
     password_app.top_window().type_keys('~')
 
 
-def get_forms(driver: webdriver.Chrome) -> Dict[str, Any]:
+def get_forms(driver: webdriver.Chrome) -> CabinetReports:
     while len(driver.get_cookies()) == 0:
         sleep(.5)
 
@@ -58,17 +55,20 @@ def get_forms(driver: webdriver.Chrome) -> Dict[str, Any]:
 
     response = requests.get(url, headers=headers, params=querystring)
 
-    return response.json()
+    return serialization.loads(response.content, CabinetReports)
 
 
 def driver_init(driver_path: str | None) -> webdriver.Chrome:
     service = ChromeService(executable_path=driver_path)
     options = webdriver.ChromeOptions()
     options.add_argument('--start-maximized')
-    return webdriver.Chrome(service=service,options=options)
+    driver = webdriver.Chrome(service=service, options=options)
+    # Chrome runs as a child of chromedriver, reaping the driver takes the browser down with it
+    REGISTRY.register(pid=driver.service.process.pid)
+    return driver
 
 
-def login(driver: webdriver.Chrome, branch: str) -> None:
+def login(driver: webdriver.Chrome, key: EdsKey) -> None:
     wait = WebDriverWait(driver, WAIT_TIME)
     driver.get('https://cabinet.stat.gov.kz/')
 
@@ -78,21 +78,30 @@ def login(driver: webdriver.Chrome, branch: str) -> None:
     wait.until(element_to_be_clickable((By.CSS_SELECTOR, '#lawAlertCheck'))).click()
     wait.until(element_to_be_clickable((By.CSS_SELECTOR, '#loginButton'))).click()
 
-    sign_auth(branch=branch)
+    sign_auth(key=key)
 
 
 def main() -> None:
     # {'17', '02', '14', '05', '08', '06', '13'}
 
-    driver_path = ChromeDriverManager().install()
+    processes.sweep()
+
+    # Key folders are resolved up front, branches with missing or ambiguous keys are skipped
+    key_store = load_key_store()
+    branches = [branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS
+                if branch_mapping['branch'] in key_store.keys]
+    if not branches:
+        logger.error('No EDS keys found')
+        return
 
-    branches = (branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS)
+    driver_path = ChromeDriverManager().install()
 
-    for branch in tqdm(iterable=branches, total=len(BRANCH_MAPPINGS), smoothing=0, desc='Проверка 1-Т'):
+    snapshot: Snapshot = {}
+    for branch in tqdm(iterable=branches, total=len(branches), smoothing=0, desc='Проверка 1-Т'):
         driver = driver_init(driver_path)
         wait = WebDriverWait(driver, WAIT_TIME)
         with driver:
-            login(driver=driver, branch=branch)
+            login(driver=driver, key=key_store.resolve(branch=branch))
 
             try:
                 wait.until(element_to_be_clickable((By.CSS_SELECTOR, '#tab-1168-btnInnerEl'))).click()
@@ -126,9 +135,10 @@ def main() -> None:
             # wait.until(element_to_be_clickable((By.CSS_SELECTOR, 'body > div:nth-child(16) > div.ui-dialog-buttonpane.ui-widget-content.ui-helper-clearfix > div > button:nth-child(1)'))).click()
             # wait.until(element_to_be_clickable((By.CSS_SELECTOR, 'body > div:nth-child(18) > div.ui-dialog-buttonpane.ui-widget-content.ui-helper-clearfix > div > button:nth-child(1)'))).click()
 
-            form_list = [form['form']['name'] for form in get_forms(driver=driver)['list']]
-            if '1-Т (квартальная)' in form_list:
-                pass
+            form_list = [report.form.name for report in get_forms(driver=driver).reports]
+            snapshot[branch] = {'1-Т (квартальная)': '1-Т (квартальная)' in form_list}
+
+    update_snapshot(snapshot=snapshot)
 
     # Aa1234
 
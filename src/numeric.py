@@ -0,0 +1,122 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional, Sequence
+
+from src.logger import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Colvir exports use comma decimals and (non-breaking) spaces as thousands separators: '1 234 567,89'
+SEPARATORS = str.maketrans({' ': None, '\xa0': None, '\u202f': None, '\t': None, ',': '.'})
+SEPARATOR_REPLACEMENTS = [(' ', ''), ('\xa0', ''), ('\u202f', ''), ('\t', ''), (',', '.')]
+VECTORIZE_THRESHOLD = 1000
+NUMBER_TYPES = (int, float, bool)
+
+
+class NumericError(ValueError):
+    pass
+
+
+@dataclass
+class Issue:
+    index: int
+    value: Any
+
+
+@lru_cache(maxsize=8192)
+def parse_number(text: str) -> Optional[float]:
+    normalized = text.translate(SEPARATORS)
+    if not normalized:
+        return None
+    return float(normalized)
+
+
+def to_float(value: Any, strict: bool = False, default: float = 0.) -> float:
+    value_type = type(value)
+    if value_type is float:
+        return value
+    if value_type is int or value_type is bool:
+        return float(value)
+    if value is None:
+        return default
+    try:
+        number = parse_number(value if value_type is str else str(value))
+    except ValueError:
+        if strict:
+            raise NumericError(f'Not a number: {value!r}')
+        logger.warning(f'Not a number: {value!r}')
+        return default
+    return default if number is None else number
+
+
+def to_int(value: Any, strict: bool = False, default: int = 0) -> int:
+    return int(to_float(value=value, strict=strict, default=default))
+
+
+def to_float_column(values: Sequence[Any], strict: bool = False,
+                    default: float = 0.) -> tuple[list[float], list[Issue]]:
+    if np is None or len(values) < VECTORIZE_THRESHOLD:
+        numbers, issues = [], []
+        for index, value in enumerate(values):
+            try:
+                numbers.append(to_float(value=value, strict=True, default=default))
+            except NumericError:
+                numbers.append(default)
+                issues.append(Issue(index=index, value=value))
+    else:
+        numbers, issues = vectorized_to_float_column(values=values, default=default)
+
+    if issues and strict:
+        raise NumericError(f'{len(issues)} cells are not numbers, first: {issues[0].value!r} at {issues[0].index}')
+    return numbers, issues
+
+
+def vectorized_to_float_column(values: Sequence[Any], default: float) -> tuple[list[float], list[Issue]]:
+    cells = np.empty(len(values), dtype=object)
+    cells[:] = values
+    is_text = np.fromiter((type(value) is str for value in values), dtype=bool, count=len(values))
+    numbers = np.full(len(values), default, dtype=np.float64)
+    issues = []
+
+    is_number = np.fromiter((type(value) in NUMBER_TYPES for value in values), dtype=bool, count=len(values))
+    if is_number.any():
+        numbers[is_number] = cells[is_number].astype(np.float64)
+    # Anything else (None, dates, ...) is rare and goes through the scalar path, which reports it the same way
+    for index in np.flatnonzero(~(is_text | is_number)):
+        try:
+            numbers[index] = to_float(value=values[index], strict=True, default=default)
+        except NumericError:
+            issues.append(Issue(index=int(index), value=values[index]))
+
+    texts = cells[is_text]
+    if texts.size:
+        text = np.array(texts, dtype=str)
+        joined = ''.join(texts)
+        # np.char.replace is a full pass over the column, only separators that occur are replaced
+        for separator, replacement in SEPARATOR_REPLACEMENTS:
+            if separator in joined:
+                text = np.char.replace(text, separator, replacement)
+        text_numbers = np.full(text.size, default, dtype=np.float64)
+        not_empty = text != ''
+        try:
+            text_numbers[not_empty] = text[not_empty].astype(np.float64)
+        except ValueError:
+            # Unparseable cells are located one by one, only on columns that have them
+            text_indices = np.flatnonzero(is_text)
+            for position in np.flatnonzero(not_empty):
+                try:
+                    text_numbers[position] = float(text[position])
+                except ValueError:
+                    issues.append(Issue(index=int(text_indices[position]), value=texts[position]))
+        numbers[is_text] = text_numbers
+
+    issues.sort(key=lambda issue: issue.index)
+    return numbers.tolist(), issues
+
+
+def to_int_column(values: Sequence[Any], strict: bool = False, default: int = 0) -> tuple[list[int], list[Issue]]:
+    numbers, issues = to_float_column(values=values, strict=strict, default=default)
+    return [int(number) for number in numbers], issues
@@ -1,20 +1,40 @@
-import json
 import os
 from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
 from os.path import join
-from typing import Callable, Optional, Union
+from typing import Callable, Iterable, Iterator, Optional, Union
+from xml.etree.ElementTree import iterparse
 
 import openpyxl
-from openpyxl.cell import Cell
+from openpyxl.utils import range_boundaries
 from openpyxl.workbook import Workbook
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
 from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.constants import SHEET_MAIN_NS
 from tqdm import tqdm
 
-from src.config import BRANCH_MAPPINGS, JSON_FOLDER, REPORTS_FOLDER
+from src.config import BEFORE_PREV_JSON_FOLDER, BRANCH_MAPPINGS, JSON_FOLDER, REPORTS_FOLDER
+from src.json_lines import Row, get_tmp_path, read_rows, write_rows, write_rows_by_key
+from src.numeric import to_float, to_int
+from src.serialization import PayrollRow
+from src.validation import ReportSchema, ReportValidator, ValidationError, read_row_counts, write_row_count
 
 Headers = list[str]
-Rows = list[dict[str, Optional[str]]]
-ExcelRow = tuple[Cell]
+Rows = Iterator[Row]
+# Rows with the index of the sheet row they were read from
+IndexedRows = Iterator[tuple[int, Row]]
+CellValue = Optional[Union[str, int, float, datetime]]
+ExcelRow = tuple[CellValue, ...]
+# The parser streams read-only sheets, the row scan benchmark also runs on fully loaded ones
+Sheet = Union[Worksheet, ReadOnlyWorksheet]
+
+SHEET_DATA_TAG = f'{{{SHEET_MAIN_NS}}}sheetData'
+ROW_TAG = f'{{{SHEET_MAIN_NS}}}row'
+MERGE_CELL_TAG = f'{{{SHEET_MAIN_NS}}}mergeCell'
+PAYROLL_HEADERS = ['Сотрудник', 'Состояние', 'Кол-во часов', 'Выплачено доходов']
+REPORT_NAMES = ['Z_160_PR_FORMOBWVEDZP_00', 'Z_160_HREMPLOYTAKETOWORK_00', 'Z_160_SHTAT_RASTANOVKA_V_00',
+                'Z_160_DISEMPLOYEE_00']
 
 
 @dataclass
@@ -23,26 +43,46 @@ class Report:
     headers_idx: int = 0
     data_idx = 0
     subheaders_exist: bool = False
-    parse_rows: Callable[[Worksheet, int, Headers], Rows] = None
+    split_by_branch: bool = False
+    parse_rows: Callable[[ReadOnlyWorksheet, int, Headers], IndexedRows] = None
+    schema: ReportSchema = None
 
     def __post_init__(self):
         if self.report_name == 'Z_160_SHTAT_RASTANOVKA_V_00':
             self.headers_idx, self.data_idx = 3, 6
             self.subheaders_exist = True
             self.parse_rows = parse_z_160_shtat_rastanovka_v_rows
+            self.schema = ReportSchema(headers=['ФИО', 'Статус работника', 'Тип работника', 'Пол'],
+                                       full_branch_coverage=True)
         elif self.report_name == 'Z_160_DISEMPLOYEE_00':
             self.headers_idx, self.data_idx = 4, 5
             self.parse_rows = parse_z_160_dismeployee_rows
+            self.schema = ReportSchema(headers=['Статья'])
         elif self.report_name == 'Z_160_HREMPLOYTAKETOWORK_00':
             self.headers_idx, self.data_idx = 5, 7
             self.parse_rows = parse_z_160_hremploytaketowork_rows
+            self.schema = ReportSchema()
+        elif self.report_name == 'Z_160_PR_FORMOBWVEDZP_00':
+            self.headers_idx, self.data_idx = 3, 5
+            self.split_by_branch = True
+            self.parse_rows = parse_z_160_pr_formobwvedzp_all_rows
+            self.schema = ReportSchema(headers=PAYROLL_HEADERS, required_columns=['Сотрудник'],
+                                       full_branch_coverage=True)
         elif 'Z_160_PR_FORMOBWVEDZP' in self.report_name:
             self.headers_idx, self.data_idx = 3, 5
             self.parse_rows = parse_z_160_pr_formobwvedzp_rows
+            self.schema = ReportSchema(headers=PAYROLL_HEADERS, required_columns=['Сотрудник'],
+                                       full_branch_coverage=True)
         else:
             raise ValueError(f'Unknown report name: {self.report_name}')
 
 
+@lru_cache(maxsize=None)
+def get_report(report_name: str) -> Report:
+    return Report(report_name=report_name)
+
+
+@lru_cache(maxsize=256)
 def get_branch(branch_name: str) -> str:
     branch_name = branch_name.strip().lower()
 
@@ -50,145 +90,273 @@ def get_branch(branch_name: str) -> str:
     branch = next((branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS
                    if branch_name in branch_mapping['long_alias'].lower()), None)
     if not branch:
-        raise ValueError(f'Unknown branch name: {branch_name}')
+        raise ValidationError(f'Unknown branch name: {branch_name}')
     return branch
 
 
 def is_row_empty(row: ExcelRow) -> bool:
-    return all(not (bool(value.strip()) if isinstance(value := cell.value, str) else bool(value)) for cell in row)
-
-
-def parse_headers(sheet: Worksheet, headers_idx: int, subheaders_exist: bool = False) -> Headers:
+    for value in row:
+        if type(value) is str:
+            if value and not value.isspace():
+                return False
+        elif value:
+            return False
+    return True
+
+
+def get_merged_rows(sheet: Sheet, column: int = 1) -> set[int]:
+    merged_rows = set()
+    if isinstance(sheet, Worksheet):
+        for cell_range in sheet.merged_cells.ranges:
+            if cell_range.min_col <= column <= cell_range.max_col:
+                merged_rows.update(range(cell_range.min_row, cell_range.max_row + 1))
+        return merged_rows
+
+    # Read-only sheets keep no merged cells, the ranges are read from the end of the sheet XML in a streaming pass
+    sheet_data = None
+    with sheet._get_source() as source:
+        for event, element in iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if element.tag == SHEET_DATA_TAG:
+                    sheet_data = element
+            elif element.tag == ROW_TAG:
+                # Rows already passed are dropped, memory does not grow with the sheet
+                sheet_data.clear()
+            elif element.tag == MERGE_CELL_TAG:
+                min_col, min_row, max_col, max_row = range_boundaries(element.get('ref'))
+                if min_col <= column <= max_col:
+                    merged_rows.update(range(min_row, max_row + 1))
+    return merged_rows
+
+
+def iter_data_rows(sheet: Sheet, data_idx: int, headers: Headers,
+                   min_col: int = 1) -> Iterator[tuple[int, ExcelRow]]:
+    # Only the columns covered by the headers are read, the branch checks need at least two of them
+    max_col = min_col + max(len(headers), 2) - 1
+    # A read-only sheet saved without its dimension does not know its width
+    if sheet.max_column:
+        max_col = min(max_col, sheet.max_column)
+    rows = sheet.iter_rows(min_row=data_idx, min_col=min_col, max_col=max_col, values_only=True)
+    return enumerate(rows, start=data_idx)
+
+
+def parse_headers(sheet: Sheet, headers_idx: int, subheaders_exist: bool = False) -> Headers:
+    # Read-only sheets have no columns to iterate, the header row and the subheader row beneath it are read as rows
+    header_rows = list(sheet.iter_rows(min_row=headers_idx, max_row=headers_idx + subheaders_exist,
+                                       values_only=True))
+    header_row = header_rows[0] if header_rows else ()
     sheet_headers = []
-    for col in sheet.iter_cols(min_row=headers_idx, max_row=headers_idx, min_col=1):
-        for header_cell in col:
-            cell_value = header_cell.value
-            if not cell_value:
-                break
-            if subheaders_exist:
-                if header_cell.coordinate == 'L3':
-                    for column in range(5):
-                        cell_beneath = sheet.cell(row=header_cell.row + 1,
-                                                  column=header_cell.column + column)
-                        sheet_headers.append(f'{cell_value}_{cell_beneath.value}')
-                    continue
-            sheet_headers.append(header_cell.value)
+    for column, cell_value in enumerate(header_row, start=1):
+        if not cell_value:
+            continue
+        if subheaders_exist and (headers_idx, column) == (3, 12):
+            subheader_row = header_rows[1]
+            for subheader_column in range(column - 1, column + 4):
+                subheader = subheader_row[subheader_column] if subheader_column < len(subheader_row) else None
+                sheet_headers.append(f'{cell_value}_{subheader}')
+            continue
+        sheet_headers.append(cell_value)
     return sheet_headers
 
 
-def parse_z_160_shtat_rastanovka_v_rows(sheet: Worksheet, data_idx: int, headers: Headers) -> Rows:
-    rows = []
-    merged_cells = sheet.merged_cells
+def parse_z_160_shtat_rastanovka_v_rows(sheet: ReadOnlyWorksheet, data_idx: int, headers: Headers) -> IndexedRows:
+    merged_rows = get_merged_rows(sheet=sheet)
     current_branch = ''
 
     row: ExcelRow
-    for i, row in enumerate(sheet.iter_rows(min_row=data_idx)):
-        if is_row_empty(row) or not (row[0].value or row[1].value):
+    for row_idx, row in iter_data_rows(sheet=sheet, data_idx=data_idx, headers=headers):
+        if is_row_empty(row) or not (row[0] or row[1]):
             continue
 
-        if merged_cells and row[0].coordinate in merged_cells:
-            value = row[0].value
+        if row_idx in merged_rows:
+            value = row[0]
             if not value.startswith(' '):
                 current_branch = value
             continue
         else:
-            value = row[0].value
-            if row[1].value is None and value is not None:
+            value = row[0]
+            if row[1] is None and value is not None:
                 if not value.startswith(' '):
                     current_branch = value
                 continue
         staff_data_row = {'Филиал': get_branch(current_branch)}
-        for header, cell in zip(headers, row):
-            staff_data_row[header] = cell.value
-        rows.append(staff_data_row)
-
-    return rows
+        staff_data_row.update(zip(headers, row))
+        yield row_idx, staff_data_row
 
 
-def parse_z_160_dismeployee_rows(sheet: Worksheet, data_idx: int, headers: Headers) -> Rows:
-    rows = []
-    merged_cells = sheet.merged_cells
+def parse_z_160_dismeployee_rows(sheet: ReadOnlyWorksheet, data_idx: int, headers: Headers) -> IndexedRows:
+    merged_rows = get_merged_rows(sheet=sheet)
     current_branch = ''
 
     row: ExcelRow
-    for i, row in enumerate(sheet.iter_rows(min_row=data_idx)):
+    for row_idx, row in iter_data_rows(sheet=sheet, data_idx=data_idx, headers=headers):
         if is_row_empty(row):
             continue
-        if row[0].value is not None and 'Итого' in row[0].value:
+        if row[0] is not None and 'Итого' in row[0]:
             continue
 
-        if merged_cells and row[0].coordinate in merged_cells:
-            value = row[0].value
+        if row_idx in merged_rows:
+            value = row[0]
             if not value.startswith(' '):
                 current_branch = value
             continue
         staff_data_row = {'Филиал': get_branch(current_branch)}
-        for header, cell in zip(headers, row):
-            staff_data_row[header] = cell.value
-        rows.append(staff_data_row)
-    return rows
+        staff_data_row.update(zip(headers, row))
+        yield row_idx, staff_data_row
 
 
-def parse_z_160_hremploytaketowork_rows(sheet: Worksheet, data_idx: int, headers: Headers) -> Rows:
-    rows = []
+def parse_z_160_hremploytaketowork_rows(sheet: ReadOnlyWorksheet, data_idx: int, headers: Headers) -> IndexedRows:
     current_branch = ''
 
     row: ExcelRow
-    for i, row in enumerate(sheet.iter_rows(min_row=data_idx, min_col=3)):
+    for row_idx, row in iter_data_rows(sheet=sheet, data_idx=data_idx, headers=headers, min_col=3):
         if is_row_empty(row):
             continue
-        if row[0].value is not None and 'Итого' in row[0].value:
+        if row[0] is not None and 'Итого' in row[0]:
             continue
-        value = row[1].value
-        if row[0].value is None and value is not None:
+        value = row[1]
+        if row[0] is None and value is not None:
             if not value.startswith(' '):
                 current_branch = value
             continue
         staff_data_row = {'Филиал': get_branch(current_branch)}
-        for header, cell in zip(headers, row):
-            staff_data_row[header] = cell.value
-        rows.append(staff_data_row)
+        staff_data_row.update(zip(headers, row))
+        yield row_idx, staff_data_row
 
-    return rows
 
-
-def parse_z_160_pr_formobwvedzp_rows(sheet: Worksheet, data_idx: int, headers: Headers) -> Rows:
-    rows = []
+def parse_z_160_pr_formobwvedzp_rows(sheet: ReadOnlyWorksheet, data_idx: int, headers: Headers) -> IndexedRows:
     brach_cell = sheet.cell(row=data_idx, column=1)
     current_branch = get_branch(brach_cell.value)
 
     row: ExcelRow
-    for i, row in enumerate(sheet.iter_rows(min_row=data_idx + 1)):
+    for row_idx, row in iter_data_rows(sheet=sheet, data_idx=data_idx + 1, headers=headers):
         if is_row_empty(row):
             break
 
         staff_data_row = {'Филиал': current_branch}
-        for header, cell in zip(headers, row):
-            staff_data_row[header] = cell.value
-        rows.append(staff_data_row)
-    return rows
+        staff_data_row.update(zip(headers, row))
+        yield row_idx, staff_data_row
+
+
+def parse_z_160_pr_formobwvedzp_all_rows(sheet: ReadOnlyWorksheet, data_idx: int, headers: Headers) -> IndexedRows:
+    merged_rows = get_merged_rows(sheet=sheet)
+    current_branch = ''
+
+    row: ExcelRow
+    for row_idx, row in iter_data_rows(sheet=sheet, data_idx=data_idx, headers=headers):
+        if is_row_empty(row):
+            continue
+        value = row[0]
+        if isinstance(value, str) and 'Итого' in value:
+            continue
+
+        if row_idx in merged_rows or not any(row[1:]):
+            # Department sub-headers are indented with a space, only branch rows switch the branch
+            if isinstance(value, str) and not value.startswith(' '):
+                current_branch = get_branch(value)
+            continue
+        staff_data_row = {'Филиал': current_branch}
+        staff_data_row.update(zip(headers, row))
+        yield row_idx, staff_data_row
 
 
-def save_to_json(report_path: str, data: Rows) -> None:
-    with open(report_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+def get_expected_branches(report: Report) -> set[str]:
+    branch = report.report_name.rsplit('_', 1)[-1]
+    if branch == '00':
+        return {branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS}
+    return {branch}
 
 
-def parse_report(report: Report) -> None:
-    file_path = join(REPORTS_FOLDER, rf'{report.report_name}.xlsx')
+def get_validator(report: Report, prev_json_folder: Optional[str] = BEFORE_PREV_JSON_FOLDER) -> ReportValidator:
+    row_counts = read_row_counts(json_folder=prev_json_folder) if prev_json_folder else {}
+    return ReportValidator(report_name=report.report_name, schema=report.schema,
+                           expected_branches=get_expected_branches(report=report),
+                           previous_row_count=row_counts.get(report.report_name))
+
+
+def iter_report_rows(report: Report, reports_folder: str = REPORTS_FOLDER,
+                     validator: Optional[ReportValidator] = None) -> Rows:
+    file_path = join(reports_folder, rf'{report.report_name}.xlsx')
 
     if not os.path.exists(file_path):
         raise FileNotFoundError(f'File {file_path} does not exist')
 
-    workbook: Workbook = openpyxl.load_workbook(file_path)
-    sheet: Worksheet = workbook.active
+    # Rows are streamed from the file, parse memory does not grow with the report
+    workbook: Workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        sheet: ReadOnlyWorksheet = workbook.active
+
+        headers = parse_headers(sheet=sheet, headers_idx=report.headers_idx,
+                                subheaders_exist=report.subheaders_exist)
+        indexed_rows = report.parse_rows(sheet=sheet, data_idx=report.data_idx, headers=headers)
+        if validator is None:
+            for _, row in indexed_rows:
+                yield row
+            return
+
+        # Headers are checked before the first row is read, rows are checked as they stream past
+        validator.check_headers(headers=headers)
+        yield from validator.watch(indexed_rows=indexed_rows)
+    finally:
+        workbook.close()
+
+
+def get_json_path(report: Report, json_folder: str = JSON_FOLDER, compress: bool = False) -> str:
+    return join(json_folder, f'{report.report_name}.jsonl{".gz" if compress else ""}')
+
+
+def get_branch_json_path(report: Report, branch: str, json_folder: str = JSON_FOLDER, compress: bool = False) -> str:
+    report_code = report.report_name.rsplit('_', 1)[0]
+    return join(json_folder, f'{report_code}_{branch}.jsonl{".gz" if compress else ""}')
+
+
+def parse_report(report: Report, reports_folder: str = REPORTS_FOLDER, json_folder: str = JSON_FOLDER,
+                 compress: bool = False, prev_json_folder: Optional[str] = BEFORE_PREV_JSON_FOLDER,
+                 validate: bool = True) -> int:
+    validator = get_validator(report=report, prev_json_folder=prev_json_folder) if validate else None
+    rows = iter_report_rows(report=report, reports_folder=reports_folder, validator=validator)
 
-    headers = parse_headers(sheet=sheet, headers_idx=report.headers_idx, subheaders_exist=report.subheaders_exist)
-    data = report.parse_rows(sheet=sheet, data_idx=report.data_idx, headers=headers)
-    save_to_json(report_path=join(JSON_FOLDER, f'{report.report_name}.json'), data=data)
+    # Rows go to temporary files that replace the outputs only once the whole report has passed validation
+    tmp_file_paths: dict[str, str] = {}
 
+    def get_tmp_file_path(file_path: str) -> str:
+        tmp_file_paths[file_path] = get_tmp_path(file_path=file_path)
+        return tmp_file_paths[file_path]
 
-def task_1t():
+    try:
+        if report.split_by_branch:
+            branch_counts = write_rows_by_key(
+                rows=rows, key='Филиал',
+                get_file_path=lambda branch: get_tmp_file_path(get_branch_json_path(
+                    report=report, branch=branch, json_folder=json_folder, compress=compress)))
+            row_count = sum(branch_counts.values())
+        else:
+            row_count = write_rows(file_path=get_tmp_file_path(get_json_path(
+                report=report, json_folder=json_folder, compress=compress)), rows=rows)
+        if validator is not None:
+            validator.finish()
+    except BaseException:
+        for tmp_file_path in tmp_file_paths.values():
+            if os.path.exists(tmp_file_path):
+                os.remove(tmp_file_path)
+        raise
+
+    for file_path, tmp_file_path in tmp_file_paths.items():
+        os.replace(tmp_file_path, file_path)
+    if report.split_by_branch:
+        # A branch missing from this export must not be aggregated from the file of an earlier run
+        for branch in get_expected_branches(report=report):
+            for compressed in (False, True):
+                file_path = get_branch_json_path(report=report, branch=branch, json_folder=json_folder,
+                                                 compress=compressed)
+                if file_path not in tmp_file_paths and os.path.exists(file_path):
+                    os.remove(file_path)
+    if validator is not None:
+        write_row_count(json_folder=json_folder, report_name=report.report_name, row_count=row_count)
+    return row_count
+
+
+def task_1t(rows: Iterable[PayrollRow]) -> tuple[int, float, int]:
     # json_files = os.listdir(JSON_FOLDER)
     # file_name = 'Z_160_PR_FORMOBWVEDZP_18.json'
     # file_path = join(JSON_FOLDER, file_name)
@@ -206,20 +374,13 @@ def task_1t():
     #
     # print(branch_employee_count, factual_branch_employee_count)
 
-
-
-
-    file_path = r"C:\Users\robot.ad\Desktop\robots\1t_otbasy\json\4 квартал 2023\Z_160_PR_FORMOBWVEDZP_18.json"
-
-    with open(file_path, encoding='utf-8') as f:
-        data = json.load(f)
-
     branch_employee_count = 0
     total_salary_fund = 0
     total_work_hours = 0
     employees = []
-    for record in data:
-        status = record['Состояние']
+    record: PayrollRow
+    for record in rows:
+        status = record.state
         if status in ['Уволен',
                       'В отпуске, Отпуск по уходу за ребенком (не достигшего 3-х лет)',
                       'Уволен, Отпуск по уходу за ребенком (не достигшего 3-х лет)'
@@ -227,22 +388,15 @@ def task_1t():
                       ]:
             continue
         else:
-            total_salary = record.get('Выплачено доходов')
-            if isinstance(total_salary, str):
-                # Замена запятой на точку для корректного преобразования в число
-                total_salary = float(total_salary.replace(',', '.'))
-            elif isinstance(total_salary, int):
-                total_salary = float(total_salary)
-            total_salary_fund += total_salary
-
-            total_work_hours += int(record.get('Кол-во часов', 0)) if record.get('Кол-во часов', 0) else 0
-        employees.append(record['Сотрудник'])
+            total_salary_fund += to_float(record.paid)
+            total_work_hours += to_int(record.hours)
+        employees.append(record.employee)
         # else:
         #     if not row['Кол-во часов']:
         #         continue
         branch_employee_count += 1
     total_salary_fund_thousand_tenge = total_salary_fund / 1000
-    print(branch_employee_count, total_salary_fund_thousand_tenge, total_work_hours)
+    return branch_employee_count, total_salary_fund_thousand_tenge, total_work_hours
     #
     #
     #
@@ -308,7 +462,9 @@ def main():
     #     report_name = file_name.split('.')[0]
     #     parse_report(report=Report(report_name=report_name))
 
-    task_1t()
+    file_path = r"C:\Users\robot.ad\Desktop\robots\1t_otbasy\json\4 квартал 2023\Z_160_PR_FORMOBWVEDZP_18.json"
+    branch_employee_count, total_salary_fund_thousand_tenge, total_work_hours = task_1t(rows=read_rows(file_path, PayrollRow))
+    print(branch_employee_count, total_salary_fund_thousand_tenge, total_work_hours)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,228 @@
+import argparse
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from os.path import basename, splitext
+from time import monotonic, sleep
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from src.config import BRANCH_MAPPINGS, JSON_FOLDER
+from src.logger import logger
+
+if TYPE_CHECKING:
+    from src.automation import Report as ColvirReport
+
+STAGE_LIMITS = {'export': 1, 'validate': 1, 'parse': 2, 'aggregate': 4}
+
+
+@dataclass
+class Task:
+    name: str
+    stage: str
+    func: Callable[[], Any]
+    deps: list[str] = field(default_factory=list)
+    result: Any = None
+    error: Optional[BaseException] = None
+    done: bool = False
+
+
+class Scheduler:
+    def __init__(self, stage_limits: Optional[dict[str, int]] = None) -> None:
+        self.stage_limits = stage_limits or STAGE_LIMITS
+        self.tasks: dict[str, Task] = {}
+
+    def add(self, task: Task) -> Task:
+        if task.name in self.tasks:
+            raise ValueError(f'Duplicate task: {task.name}')
+        self.tasks[task.name] = task
+        return task
+
+    def check(self) -> None:
+        for task in self.tasks.values():
+            if task.stage not in self.stage_limits:
+                raise ValueError(f'Unknown stage {task.stage} of task {task.name}')
+            for dep in task.deps:
+                if dep not in self.tasks:
+                    raise ValueError(f'Unknown dependency {dep} of task {task.name}')
+
+        visited, in_progress = set(), set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in in_progress:
+                raise ValueError(f'Dependency cycle through task {name}')
+            in_progress.add(name)
+            for dep in self.tasks[name].deps:
+                visit(dep)
+            in_progress.remove(name)
+            visited.add(name)
+
+        for name in self.tasks:
+            visit(name)
+
+    def run(self) -> dict[str, Task]:
+        self.check()
+
+        dependents: dict[str, list[str]] = {name: [] for name in self.tasks}
+        pending_deps = {name: len(task.deps) for name, task in self.tasks.items()}
+        for task in self.tasks.values():
+            for dep in task.deps:
+                dependents[dep].append(task.name)
+
+        executors = {stage: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=stage)
+                     for stage, limit in self.stage_limits.items()}
+        running: dict[Future, Task] = {}
+
+        def submit(task: Task) -> None:
+            running[executors[task.stage].submit(task.func)] = task
+
+        def skip(task: Task, error: BaseException) -> None:
+            task.error, task.done = error, True
+            logger.error(f'Task {task.name} skipped: {error}')
+            for name in dependents[task.name]:
+                if not self.tasks[name].done:
+                    skip(self.tasks[name], error)
+
+        try:
+            for name, count in pending_deps.items():
+                if count == 0:
+                    submit(self.tasks[name])
+
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    task.done = True
+                    if (error := future.exception()) is not None:
+                        task.error = error
+                        logger.error(f'Task {task.name} failed', exc_info=error)
+                        for name in dependents[task.name]:
+                            skip(self.tasks[name], error)
+                        continue
+
+                    task.result = future.result()
+                    logger.info(f'Task {task.name} finished')
+                    for name in dependents[task.name]:
+                        pending_deps[name] -= 1
+                        if pending_deps[name] == 0 and not self.tasks[name].done:
+                            submit(self.tasks[name])
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        return self.tasks
+
+
+@dataclass
+class Stages:
+    export: Callable[['ColvirReport'], None]
+    validate: Callable[['ColvirReport'], bool]
+    parse: Callable[[str], int]
+    aggregate: Callable[[str], Any]
+    poll_interval: float = 1.
+    validate_timeout: float = 60. * 60.
+
+
+def get_report_name(report: 'ColvirReport') -> str:
+    return splitext(basename(report.file_path))[0]
+
+
+def wait_until_valid(stages: Stages, report: 'ColvirReport') -> None:
+    start = monotonic()
+    while not stages.validate(report):
+        if monotonic() - start > stages.validate_timeout:
+            raise TimeoutError(f'{report.file_path} was not exported in {stages.validate_timeout:.0f} s')
+        sleep(stages.poll_interval)
+
+
+def build_scheduler(reports: list['ColvirReport'], stages: Stages,
+                    stage_limits: Optional[dict[str, int]] = None) -> Scheduler:
+    scheduler = Scheduler(stage_limits=stage_limits)
+    for report in reports:
+        report_name = get_report_name(report=report)
+        export_task = scheduler.add(Task(name=f'export:{report_name}', stage='export',
+                                    func=lambda report=report: stages.export(report)))
+        validate_task = scheduler.add(Task(name=f'validate:{report_name}', stage='validate',
+                                      func=lambda report=report: wait_until_valid(stages=stages, report=report),
+                                      deps=[export_task.name]))
+        parse_task = scheduler.add(Task(name=f'parse:{report_name}', stage='parse',
+                                   func=lambda report_name=report_name: stages.parse(report_name),
+                                   deps=[validate_task.name]))
+
+        if report.code != 'Z_160_PR_FORMOBWVEDZP':
+            continue
+        branches = [branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS] \
+            if report.branch == '00' else [report.branch]
+        for branch in branches:
+            scheduler.add(Task(name=f'aggregate:{branch}', stage='aggregate',
+                               func=lambda branch=branch: stages.aggregate(branch), deps=[parse_task.name]))
+    return scheduler
+
+
+def export(report: 'ColvirReport') -> None:
+    from src import colvir_utils
+
+    colvir_utils.AUTOMATION.export(report=report)
+
+
+def parse(report_name: str) -> int:
+    from src import parser
+
+    return parser.parse_report(report=parser.get_report(report_name=report_name))
+
+
+def aggregate(branch: str) -> Optional[tuple[int, float, int]]:
+    from src import parser
+    from src.json_lines import read_rows
+    from src.serialization import PayrollRow
+
+    report = parser.get_report(report_name=f'Z_160_PR_FORMOBWVEDZP_{branch}')
+    if not os.path.exists(json_path := parser.get_json_path(report=report)):
+        logger.warning(f'1-T {branch}: no rows in the export, skipped')
+        return None
+    indicators = parser.task_1t(rows=read_rows(json_path, PayrollRow))
+    logger.info(f'1-T {branch}: {indicators}')
+    return indicators
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Exports, parses and aggregates the 1-T reports')
+    arg_parser.add_argument('--preflight', action='store_true',
+                            help='Check credentials, Colvir, EDS keys and ChromeDriver, then exit')
+    args = arg_parser.parse_args()
+
+    if args.preflight:
+        from src import preflight
+
+        raise SystemExit(0 if preflight.main() else 1)
+
+    from src import colvir, processes
+    from src.snapshot import update_snapshot
+    from src.validation_pool import ValidationPool
+
+    processes.sweep()
+    os.makedirs(JSON_FOLDER, exist_ok=True)
+    reports = colvir.get_reports()
+    if not reports:
+        logger.info('No reports to export')
+        return
+
+    # The validate stage only waits on the pool, which bounds the Excel work by its own worker count
+    with ValidationPool() as pool:
+        stages = Stages(export=export, validate=pool.wait_until_valid, parse=parse, aggregate=aggregate)
+        stage_limits = {**STAGE_LIMITS, 'validate': len(reports)}
+        tasks = build_scheduler(reports=reports, stages=stages, stage_limits=stage_limits).run()
+
+    snapshot = {}
+    for task in tasks.values():
+        if task.stage == 'aggregate' and task.error is None and task.result is not None:
+            branch = task.name.split(':')[-1]
+            employee_count, salary_fund, work_hours = task.result
+            snapshot[branch] = {'Численность': employee_count, 'ФОТ, тыс. тенге': round(salary_fund, 2),
+                                'Отработано часов': work_hours}
+    update_snapshot(snapshot=snapshot)
+
+
+if __name__ == '__main__':
+    main()
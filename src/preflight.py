@@ -0,0 +1,138 @@
+import os
+import threading
+from dataclasses import dataclass
+from functools import partial
+from time import monotonic
+from typing import Callable, Optional
+
+from src.config import BASE_PATH, CREDENTIALS, Credentials, PROCESS_PATH
+from src.key_store import KeyStore, load_key_store
+from src.logger import logger
+
+CHECK_TIMEOUT = 30.
+
+
+class PreflightError(Exception):
+    pass
+
+
+@dataclass
+class Check:
+    name: str
+    func: Callable[[], str]
+
+
+@dataclass
+class CheckResult:
+    name: str
+    ok: bool
+    detail: str
+    elapsed: float
+
+    def __str__(self) -> str:
+        return f'{"OK  " if self.ok else "FAIL"} {self.name:<20} {self.elapsed:6.2f}s  {self.detail}'
+
+
+def check_credentials(credentials: Credentials = CREDENTIALS) -> str:
+    missing = [name for name, value in (('COLVIR_USR', credentials.user), ('COLVIR_PSW', credentials.password))
+               if not value]
+    if missing:
+        raise PreflightError(f'{", ".join(missing)} not set')
+    return f'user {credentials.user}'
+
+
+def check_process_path(process_path: str = PROCESS_PATH, is_file: Callable[[str], bool] = os.path.isfile) -> str:
+    if not is_file(process_path):
+        raise PreflightError(f'{process_path} not found')
+    return process_path
+
+
+def check_key_share(base_path: str = BASE_PATH,
+                    load: Callable[..., KeyStore] = load_key_store) -> str:
+    # Loading the key store refreshes the key manifest, so the run itself reads it from cache
+    try:
+        key_store = load(base_path=base_path)
+    except OSError as error:
+        raise PreflightError(f'{base_path} is unreachable: {error}')
+    if not key_store.keys:
+        raise PreflightError(f'No EDS keys in {base_path}')
+    problems = f', problems: {sorted(key_store.problems)}' if key_store.problems else ''
+    return f'{len(key_store.keys)} keys{problems}'
+
+
+def install_chromedriver() -> str:
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    return ChromeDriverManager().install()
+
+
+def check_chromedriver(install: Callable[[], str] = install_chromedriver,
+                       is_file: Callable[[str], bool] = os.path.isfile) -> str:
+    # webdriver_manager caches the binary, a successful install here is a cache hit for the run
+    try:
+        driver_path = install()
+    except Exception as error:
+        raise PreflightError(f'ChromeDriver download failed: {error}')
+    if not is_file(driver_path):
+        raise PreflightError(f'ChromeDriver not found at {driver_path}')
+    return driver_path
+
+
+def get_checks(credentials: Credentials = CREDENTIALS, process_path: str = PROCESS_PATH,
+               base_path: str = BASE_PATH, load: Callable[..., KeyStore] = load_key_store,
+               install: Callable[[], str] = install_chromedriver,
+               is_file: Callable[[str], bool] = os.path.isfile) -> list[Check]:
+    return [
+        Check(name='credentials', func=partial(check_credentials, credentials=credentials)),
+        Check(name='colvir', func=partial(check_process_path, process_path=process_path, is_file=is_file)),
+        Check(name='eds keys', func=partial(check_key_share, base_path=base_path, load=load)),
+        Check(name='chromedriver', func=partial(check_chromedriver, install=install, is_file=is_file)),
+    ]
+
+
+def run_check(check: Check) -> CheckResult:
+    start = monotonic()
+    try:
+        detail, ok = check.func(), True
+    except Exception as error:
+        detail, ok = str(error) or type(error).__name__, False
+    return CheckResult(name=check.name, ok=ok, detail=detail, elapsed=monotonic() - start)
+
+
+def run_preflight(checks: Optional[list[Check]] = None, timeout: float = CHECK_TIMEOUT) -> list[CheckResult]:
+    if checks is None:
+        checks = get_checks()
+
+    # Daemon threads: a hung share or download is reported and abandoned, it does not keep the process alive
+    results_by_check: dict[int, CheckResult] = {}
+
+    def run_indexed(index: int, check: Check) -> None:
+        results_by_check[index] = run_check(check=check)
+
+    threads = [threading.Thread(target=run_indexed, args=(index, check), name=f'preflight-{check.name}', daemon=True)
+               for index, check in enumerate(checks)]
+    start = monotonic()
+    for thread in threads:
+        thread.start()
+    results = []
+    for index, (check, thread) in enumerate(zip(checks, threads)):
+        thread.join(timeout=max(timeout - (monotonic() - start), 0))
+        if (result := results_by_check.get(index)) is None:
+            result = CheckResult(name=check.name, ok=False, detail=f'No answer in {timeout:g}s',
+                                 elapsed=monotonic() - start)
+        results.append(result)
+
+    for result in results:
+        (logger.info if result.ok else logger.error)(f'Preflight {result}')
+    return results
+
+
+def main() -> bool:
+    results = run_preflight()
+    for result in results:
+        print(result)
+    return all(result.ok for result in results)
+
+
+if __name__ == '__main__':
+    raise SystemExit(0 if main() else 1)
@@ -0,0 +1,132 @@
+import atexit
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+from os.path import exists, join
+from typing import Iterable, Optional
+
+import psutil
+
+from src.config import PIDS_FOLDER
+from src.logger import logger
+
+
+@dataclass
+class TrackedProcess:
+    pid: int
+    create_time: float
+    name: str
+
+
+def get_tracked_process(pid: int) -> Optional[TrackedProcess]:
+    try:
+        process = psutil.Process(pid)
+        return TrackedProcess(pid=pid, create_time=process.create_time(), name=process.name())
+    except psutil.NoSuchProcess:
+        return None
+
+
+def get_process(tracked: TrackedProcess) -> Optional[psutil.Process]:
+    # The creation time guards against killing an unrelated process that reused the PID
+    try:
+        process = psutil.Process(tracked.pid)
+        if process.create_time() != tracked.create_time:
+            return None
+        return process
+    except psutil.NoSuchProcess:
+        return None
+
+
+def terminate(processes: list[psutil.Process], timeout: float = 3.) -> None:
+    process_tree = {process.pid: process for process in processes}
+    for process in processes:
+        try:
+            process_tree.update((child.pid, child) for child in process.children(recursive=True))
+        except psutil.NoSuchProcess:
+            continue
+    processes = list(process_tree.values())
+    for process in processes:
+        try:
+            process.terminate()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    _, alive = psutil.wait_procs(processes, timeout=timeout)
+    for process in alive:
+        try:
+            process.kill()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+
+
+class ProcessRegistry:
+    def __init__(self, pids_folder: str, owner_pid: Optional[int] = None) -> None:
+        self.owner = get_tracked_process(pid=owner_pid or os.getpid())
+        self.file_path = join(pids_folder, f'{self.owner.pid}.json')
+        self.processes: dict[int, TrackedProcess] = {}
+        self.lock = threading.Lock()
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+        tmp_file_path = f'{self.file_path}.tmp'
+        with open(tmp_file_path, 'w', encoding='utf-8') as f:
+            json.dump({'owner': asdict(self.owner),
+                       'processes': [asdict(tracked) for tracked in self.processes.values()]}, f)
+        os.replace(tmp_file_path, self.file_path)
+
+    def register(self, pid: int) -> None:
+        if (tracked := get_tracked_process(pid=pid)) is None:
+            return
+        with self.lock:
+            self.processes = {known.pid: known for known in self.processes.values() if get_process(tracked=known)}
+            self.processes[pid] = tracked
+            self.save()
+        logger.info(f'Registered {tracked.name} ({pid})')
+
+    def reap(self, pids: Optional[Iterable[int]] = None, timeout: float = 3.) -> None:
+        with self.lock:
+            pids = list(self.processes) if pids is None else [pid for pid in pids if pid in self.processes]
+            tracked_processes = [self.processes.pop(pid) for pid in pids]
+            self.save()
+        processes = [process for tracked in tracked_processes if (process := get_process(tracked=tracked))]
+        if processes:
+            logger.info(f'Reaping {[process.pid for process in processes]}')
+            terminate(processes=processes, timeout=timeout)
+
+    def close(self) -> None:
+        self.reap()
+        if exists(self.file_path):
+            os.remove(self.file_path)
+
+
+def sweep(pids_folder: str = PIDS_FOLDER, timeout: float = 3.) -> int:
+    if not exists(pids_folder):
+        return 0
+
+    reaped = 0
+    for file_name in os.listdir(pids_folder):
+        if not file_name.endswith('.json'):
+            continue
+        file_path = join(pids_folder, file_name)
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                pid_file = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        # Pid files of robots that are still running belong to them
+        if get_process(tracked=TrackedProcess(**pid_file['owner'])):
+            continue
+
+        processes = [process for tracked in pid_file['processes']
+                     if (process := get_process(tracked=TrackedProcess(**tracked)))]
+        if processes:
+            logger.info(f'Reaping {[process.pid for process in processes]} left by {file_name}')
+            terminate(processes=processes, timeout=timeout)
+            reaped += len(processes)
+        os.remove(file_path)
+    return reaped
+
+
+REGISTRY = ProcessRegistry(pids_folder=PIDS_FOLDER)
+atexit.register(REGISTRY.close)
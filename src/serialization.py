@@ -0,0 +1,117 @@
+import dataclasses
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Optional, Type, Union, get_args, get_origin
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+Fields = list[tuple[str, Any, str]]
+
+
+def encode_default(obj: Any) -> str:
+    # orjson and msgspec write dates as ISO 8601 themselves, the stdlib backend has to write the same bytes
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+
+def json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=encode_default, separators=(',', ':')).encode('utf-8')
+
+
+def orjson_dumps(obj: Any) -> bytes:
+    return orjson.dumps(obj, default=encode_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def msgspec_dumps(obj: Any) -> bytes:
+    return msgspec.json.encode(obj, enc_hook=encode_default)
+
+
+BACKENDS: dict[str, tuple[Callable[[Any], bytes], Callable[[Union[bytes, str]], Any]]] = {
+    'json': (json_dumps, json.loads)
+}
+if orjson:
+    BACKENDS['orjson'] = (orjson_dumps, orjson.loads)
+if msgspec:
+    BACKENDS['msgspec'] = (msgspec_dumps, msgspec.json.decode)
+
+BACKEND = next(backend for backend in ('orjson', 'msgspec', 'json') if backend in BACKENDS)
+_dumps, _loads = BACKENDS[BACKEND]
+
+
+def set_backend(backend: str) -> None:
+    global BACKEND, _dumps, _loads
+    if backend not in BACKENDS:
+        raise ValueError(f'JSON backend {backend} is not installed')
+    BACKEND = backend
+    _dumps, _loads = BACKENDS[backend]
+
+
+def define_struct(name: str, fields: Fields) -> Type:
+    # Attribute names are ASCII, the JSON keys (Cyrillic headers, cabinet API names) are kept as field names
+    if msgspec:
+        return msgspec.defstruct(name, [(attr, field_type, msgspec.field(default=None, name=key))
+                                        for attr, field_type, key in fields])
+    return dataclasses.make_dataclass(name, [
+        (attr, field_type, dataclasses.field(default=None, metadata={'name': key}))
+        for attr, field_type, key in fields
+    ])
+
+
+def from_builtins(obj: Any, type_: Type) -> Any:
+    if obj is None:
+        return None
+    if get_origin(type_) is Union:
+        type_ = next(arg for arg in get_args(type_) if arg is not type(None))
+    if dataclasses.is_dataclass(type_):
+        return type_(**{field.name: from_builtins(obj.get(field.metadata['name']), field.type)
+                        for field in dataclasses.fields(type_)})
+    if get_origin(type_) is list:
+        item_type, = get_args(type_)
+        return [from_builtins(item, item_type) for item in obj]
+    return obj
+
+
+_decoders: dict[Type, Any] = {}
+
+
+def dumps(obj: Any) -> bytes:
+    return _dumps(obj)
+
+
+def loads(data: Union[bytes, str], type_: Optional[Type] = None) -> Any:
+    if type_ is None:
+        return _loads(data)
+    if BACKEND == 'msgspec':
+        if (decoder := _decoders.get(type_)) is None:
+            decoder = _decoders[type_] = msgspec.json.Decoder(type=type_)
+        return decoder.decode(data)
+    return convert(_loads(data), type_)
+
+
+def convert(obj: Any, type_: Type) -> Any:
+    if msgspec:
+        return msgspec.convert(obj, type=type_)
+    return from_builtins(obj, type_)
+
+
+CabinetForm = define_struct('CabinetForm', [('name', Optional[str], 'name')])
+CabinetReport = define_struct('CabinetReport', [('form', Optional[CabinetForm], 'form')])
+CabinetReports = define_struct('CabinetReports', [('reports', list[CabinetReport], 'list')])
+
+CellValue = Union[int, float, str, None]
+PayrollRow = define_struct('PayrollRow', [
+    ('branch', Optional[str], 'Филиал'),
+    ('employee', Optional[str], 'Сотрудник'),
+    ('state', Optional[str], 'Состояние'),
+    ('hours', CellValue, 'Кол-во часов'),
+    ('paid', CellValue, 'Выплачено доходов'),
+])
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from os.path import dirname, exists
+from typing import Any, Optional
+
+from src.config import BEFORE_PREV_SNAPSHOT_PATH, BOT, SNAPSHOT_PATH
+from src.logger import logger
+from src.telegram_bot import TelegramBot
+
+Snapshot = dict[str, dict[str, Any]]
+
+MESSAGE_LIMIT = 4096
+
+
+@dataclass
+class Change:
+    branch: str
+    indicator: str
+    old: Any
+    new: Any
+
+    def __str__(self) -> str:
+        return f'{self.indicator}: {format_value(self.old)} → {format_value(self.new)}'
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return '—'
+    if isinstance(value, bool):
+        return 'есть' if value else 'нет'
+    return str(value)
+
+
+def load_snapshot(file_path: str) -> Snapshot:
+    if not exists(file_path):
+        return {}
+    with open(file_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_snapshot(file_path: str, snapshot: Snapshot) -> None:
+    os.makedirs(dirname(file_path), exist_ok=True)
+    tmp_file_path = f'{file_path}.tmp'
+    with open(tmp_file_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=4, sort_keys=True)
+    os.replace(tmp_file_path, file_path)
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> list[Change]:
+    # Only branches and indicators present in the new snapshot are compared, a partial run reports no removals
+    changes = []
+    for branch, indicators in new.items():
+        old_indicators = old.get(branch, {})
+        for indicator, value in indicators.items():
+            if (old_value := old_indicators.get(indicator)) != value:
+                changes.append(Change(branch=branch, indicator=indicator, old=old_value, new=value))
+    return changes
+
+
+def format_changes(changes: list[Change]) -> list[str]:
+    lines = []
+    branch = None
+    for change in changes:
+        if change.branch != branch:
+            branch = change.branch
+            lines.append(f'Филиал {branch}:')
+        lines.append(f'  {change}')
+
+    messages, message = [], ''
+    for line in lines:
+        if message and len(message) + len(line) + 1 > MESSAGE_LIMIT:
+            messages.append(message)
+            message = ''
+        message = f'{message}\n{line}' if message else line
+    if message:
+        messages.append(message)
+    return messages
+
+
+def notify_changes(changes: list[Change], bot: TelegramBot = BOT) -> None:
+    if messages := format_changes(changes=changes):
+        asyncio.run(bot.send_messages(messages=messages))
+
+
+def update_snapshot(snapshot: Snapshot, file_path: str = SNAPSHOT_PATH,
+                    fallback_file_path: Optional[str] = BEFORE_PREV_SNAPSHOT_PATH,
+                    bot: Optional[TelegramBot] = BOT) -> list[Change]:
+    current = load_snapshot(file_path=file_path)
+    # Indicators not collected yet this quarter are compared with the previous quarter
+    previous = load_snapshot(file_path=fallback_file_path) if fallback_file_path else {}
+    for branch, indicators in current.items():
+        previous.setdefault(branch, {}).update(indicators)
+
+    changes = diff_snapshots(old=previous, new=snapshot)
+    logger.info(f'{len(changes)} changes since the previous snapshot')
+
+    # The snapshot is saved only once the changes are delivered, otherwise the next run sends them again
+    if changes and bot is not None:
+        try:
+            notify_changes(changes=changes, bot=bot)
+        except Exception as error:
+            logger.error(f'Changes were not sent, snapshot kept as it was: {error!r}')
+            return changes
+
+    for branch, indicators in snapshot.items():
+        current.setdefault(branch, {}).update(indicators)
+    save_snapshot(file_path=file_path, snapshot=current)
+    return changes
@@ -0,0 +1,201 @@
+import os
+import random
+from os.path import join
+from typing import Optional
+
+import openpyxl
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+from src.config import BRANCH_MAPPINGS
+
+SHTAT_HEADERS = ['Подразделение', 'Должность', 'ФИО', 'Табельный номер', 'Статус работника', 'Тип работника',
+                 'Пол', 'Дата рождения', 'Дата приема', 'Категория', 'Ставка']
+SHTAT_SUBHEADER = 'Оклад'
+SHTAT_SUBHEADERS = ['Минимальный', 'Максимальный', 'Базовый', 'Надбавка', 'Итого']
+DISEMPLOYEE_HEADERS = ['ФИО', 'Табельный номер', 'Должность', 'Подразделение', 'Дата приема', 'Дата увольнения',
+                       'Статья']
+HREMPLOYTAKETOWORK_HEADERS = ['№', 'Код', 'ФИО', 'Табельный номер', 'Должность', 'Подразделение', 'Дата приема',
+                              'Вид приема']
+PR_FORMOBWVEDZP_HEADERS = ['Сотрудник', 'Табельный номер', 'Должность', 'Состояние', 'Кол-во часов', 'Кол-во дней',
+                           'Начислено доходов', 'Удержано', 'Выплачено доходов']
+
+LAST_NAMES = ['Ахметов', 'Абдрахманова', 'Иванов', 'Сейткали', 'Нурланова', 'Касымов', 'Жумабаева', 'Ким',
+              'Оспанов', 'Тулегенова', 'Петров', 'Бекова']
+FIRST_NAMES = ['Айдар', 'Асель', 'Ерлан', 'Динара', 'Нурлан', 'Гульнара', 'Сергей', 'Жанна', 'Марат', 'Алия']
+POSITIONS = ['Главный специалист', 'Ведущий специалист', 'Менеджер', 'Кассир', 'Начальник отдела',
+             'Директор филиала', 'Специалист']
+DEPARTMENTS = ['Отдел продаж', 'Операционный отдел', 'Кредитный отдел', 'Бухгалтерия', 'Отдел кадров']
+STATES = ['Работающий', 'Работающий', 'Работающий', 'Работающий', 'Уволен',
+          'В отпуске, Отпуск по уходу за ребенком (не достигшего 3-х лет)',
+          'Уволен, Отпуск по уходу за ребенком (не достигшего 3-х лет)',
+          'Работающий, Отпуск по уходу за ребенком (не достигшего 3-х лет)']
+REASONS = ['п. 5 ст. 49 Трудового Кодекса Республики Казахстан',
+           'п. 5 ст. 49 Трудового Кодекса Республики Казахстан; '
+           '(расторжение трудового договора по инициативе работника)',
+           'п. 1 ст. 49 Трудового Кодекса Республики Казахстан. (Расторжение трудового договора по соглашению сторон)']
+
+
+def get_branch_alias(branch: str) -> str:
+    return next(branch_mapping['long_alias'] for branch_mapping in BRANCH_MAPPINGS
+                if branch_mapping['branch'] == branch)
+
+
+def split_rows(rows: int, branches: list[str]) -> list[int]:
+    base, rest = divmod(rows, len(branches))
+    return [base + (1 if i < rest else 0) for i in range(len(branches))]
+
+
+def random_name(rnd: random.Random) -> str:
+    return f'{rnd.choice(LAST_NAMES)} {rnd.choice(FIRST_NAMES)}'
+
+
+def random_date(rnd: random.Random, start_year: int = 1970, end_year: int = 2023) -> str:
+    return f'{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(start_year, end_year)}'
+
+
+def random_amount(rnd: random.Random) -> float | int | str:
+    amount = round(rnd.uniform(150_000, 2_500_000), 2)
+    kind = rnd.random()
+    if kind < .4:
+        return f'{amount:.2f}'.replace('.', ',')
+    if kind < .5:
+        return int(amount)
+    return amount
+
+
+def write_title(sheet: Worksheet, title: str, width: int) -> None:
+    sheet.cell(row=1, column=1, value=title)
+    sheet.merge_cells(start_row=1, start_column=1, end_row=1, end_column=width)
+
+
+def write_branch_row(sheet: Worksheet, row: int, value: str, width: int, start_column: int = 1) -> None:
+    sheet.cell(row=row, column=start_column, value=value)
+    sheet.merge_cells(start_row=row, start_column=start_column, end_row=row, end_column=width)
+
+
+def write_numbering_row(sheet: Worksheet, row: int, width: int) -> None:
+    for column in range(1, width + 1):
+        sheet.cell(row=row, column=column, value=column)
+
+
+def fill_shtat_rastanovka_v(sheet: Worksheet, rows: int, branches: list[str], rnd: random.Random) -> None:
+    width = len(SHTAT_HEADERS) + len(SHTAT_SUBHEADERS)
+    write_title(sheet=sheet, title='Штатная расстановка', width=width)
+    for column, header in enumerate(SHTAT_HEADERS, start=1):
+        sheet.cell(row=3, column=column, value=header)
+        sheet.merge_cells(start_row=3, start_column=column, end_row=4, end_column=column)
+    subheader_column = len(SHTAT_HEADERS) + 1
+    sheet.cell(row=3, column=subheader_column, value=SHTAT_SUBHEADER)
+    sheet.merge_cells(start_row=3, start_column=subheader_column, end_row=3, end_column=width)
+    for offset, subheader in enumerate(SHTAT_SUBHEADERS):
+        sheet.cell(row=4, column=subheader_column + offset, value=subheader)
+    write_numbering_row(sheet=sheet, row=5, width=width)
+
+    row_idx = 6
+    for branch, branch_rows in zip(branches, split_rows(rows=rows, branches=branches)):
+        write_branch_row(sheet=sheet, row=row_idx, value=get_branch_alias(branch), width=width)
+        row_idx += 1
+        for i in range(branch_rows):
+            if i % 25 == 0:
+                write_branch_row(sheet=sheet, row=row_idx, value=f'  {rnd.choice(DEPARTMENTS)}', width=width)
+                row_idx += 1
+            salary = round(rnd.uniform(150_000, 900_000), 2)
+            sheet.append([rnd.choice(DEPARTMENTS), rnd.choice(POSITIONS), random_name(rnd), str(rnd.randint(1, 99999)),
+                          rnd.choice(['Работающий', 'В отпуске']), rnd.choice(['Основной', 'Совместитель']),
+                          rnd.choice(['Мужчина', 'Женщина']), random_date(rnd), random_date(rnd, 2000),
+                          rnd.choice(['A1', 'B2', 'C3']), 1,
+                          salary * .8, salary * 1.2, salary, round(salary * .1, 2), round(salary * 1.1, 2)])
+            row_idx += 1
+
+
+def fill_disemployee(sheet: Worksheet, rows: int, branches: list[str], rnd: random.Random) -> None:
+    width = len(DISEMPLOYEE_HEADERS)
+    write_title(sheet=sheet, title='Уволенные сотрудники', width=width)
+    for column, header in enumerate(DISEMPLOYEE_HEADERS, start=1):
+        sheet.cell(row=4, column=column, value=header)
+
+    row_idx = 5
+    for branch, branch_rows in zip(branches, split_rows(rows=rows, branches=branches)):
+        write_branch_row(sheet=sheet, row=row_idx, value=get_branch_alias(branch), width=width)
+        row_idx += 1
+        for _ in range(branch_rows):
+            sheet.append([random_name(rnd), str(rnd.randint(1, 99999)), rnd.choice(POSITIONS),
+                          rnd.choice(DEPARTMENTS), random_date(rnd, 2000), random_date(rnd, 2023),
+                          rnd.choice(REASONS)])
+            row_idx += 1
+        sheet.cell(row=row_idx, column=1, value=f'Итого по филиалу: {branch_rows}')
+        row_idx += 1
+
+
+def fill_hremploytaketowork(sheet: Worksheet, rows: int, branches: list[str], rnd: random.Random) -> None:
+    width = len(HREMPLOYTAKETOWORK_HEADERS)
+    write_title(sheet=sheet, title='Принятые на работу', width=width)
+    for column, header in enumerate(HREMPLOYTAKETOWORK_HEADERS, start=1):
+        sheet.cell(row=5, column=column, value=header)
+    write_numbering_row(sheet=sheet, row=6, width=width)
+
+    row_idx = 7
+    number = 1
+    for branch, branch_rows in zip(branches, split_rows(rows=rows, branches=branches)):
+        sheet.cell(row=row_idx, column=4, value=get_branch_alias(branch))
+        row_idx += 1
+        for _ in range(branch_rows):
+            sheet.append([number, str(rnd.randint(1, 9999)), random_name(rnd), str(rnd.randint(1, 99999)),
+                          rnd.choice(POSITIONS), rnd.choice(DEPARTMENTS), random_date(rnd, 2023),
+                          rnd.choice(['Прием', 'Перевод'])])
+            number += 1
+            row_idx += 1
+        sheet.cell(row=row_idx, column=3, value='Итого')
+        row_idx += 1
+
+
+def fill_pr_formobwvedzp(sheet: Worksheet, rows: int, branches: list[str], rnd: random.Random) -> None:
+    width = len(PR_FORMOBWVEDZP_HEADERS)
+    write_title(sheet=sheet, title='Общая ведомость по заработной плате', width=width)
+    for column, header in enumerate(PR_FORMOBWVEDZP_HEADERS, start=1):
+        sheet.cell(row=3, column=column, value=header)
+    write_numbering_row(sheet=sheet, row=4, width=width)
+
+    row_idx = 5
+    for branch, branch_rows in zip(branches, split_rows(rows=rows, branches=branches)):
+        write_branch_row(sheet=sheet, row=row_idx, value=get_branch_alias(branch), width=width)
+        row_idx += 1
+        for _ in range(branch_rows):
+            hours = rnd.choice([None, 0, 168, 176, 480, 496, 504])
+            sheet.append([random_name(rnd), str(rnd.randint(1, 99999)), rnd.choice(POSITIONS), rnd.choice(STATES),
+                          hours, hours // 8 if hours else None,
+                          random_amount(rnd), random_amount(rnd), random_amount(rnd)])
+            row_idx += 1
+        # The all-branches export closes every branch block with a total and an empty row
+        if len(branches) > 1:
+            sheet.cell(row=row_idx, column=1, value=f'Итого по филиалу: {branch_rows}')
+            sheet.cell(row=row_idx + 1, column=1)
+            row_idx += 2
+
+
+def generate_report(report_name: str, rows: int, folder: str, branches: Optional[list[str]] = None,
+                    seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    if not branches:
+        branches = [branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS]
+
+    workbook: Workbook = openpyxl.Workbook()
+    sheet: Worksheet = workbook.active
+
+    if report_name == 'Z_160_SHTAT_RASTANOVKA_V_00':
+        fill_shtat_rastanovka_v(sheet=sheet, rows=rows, branches=branches, rnd=rnd)
+    elif report_name == 'Z_160_DISEMPLOYEE_00':
+        fill_disemployee(sheet=sheet, rows=rows, branches=branches, rnd=rnd)
+    elif report_name == 'Z_160_HREMPLOYTAKETOWORK_00':
+        fill_hremploytaketowork(sheet=sheet, rows=rows, branches=branches, rnd=rnd)
+    elif 'Z_160_PR_FORMOBWVEDZP' in report_name:
+        branch = report_name.split('_')[-1]
+        fill_pr_formobwvedzp(sheet=sheet, rows=rows, branches=[branch] if branch in branches else branches, rnd=rnd)
+    else:
+        raise ValueError(f'Unknown report name: {report_name}')
+
+    os.makedirs(folder, exist_ok=True)
+    file_path = join(folder, f'{report_name}.xlsx')
+    workbook.save(file_path)
+    return file_path
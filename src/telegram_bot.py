@@ -18,6 +18,12 @@ class TelegramBot:
     async def send_message(self, message: str) -> None:
         await self.bot.send_message(chat_id=self.chat_id, text=message)
 
+    async def send_messages(self, messages: list[str]) -> None:
+        # One HTTP session for all messages, closed before the event loop that opened it ends
+        async with self.bot:
+            for message in messages:
+                await self.send_message(message=message)
+
     @retry(TelegramError, tries=5, delay=2, backoff=2)
     async def send_picture(self, image: Image, caption: str = None) -> None:
         image_io = BytesIO()
@@ -1,22 +1,11 @@
 from contextlib import contextmanager
 from time import sleep
-from typing import Optional
 
-import psutil
 import win32com.client as win32
-from pywinauto import Application, ElementNotFoundError, WindowSpecification
+import win32process
+from pywinauto import Application, ElementNotFoundError
 
-from src.config import PROCESS_PATH
-
-
-def kill_all_processes(proc_name: str) -> None:
-    for proc in psutil.process_iter():
-        if proc_name in proc.name():
-            try:
-                process = psutil.Process(proc.pid)
-                process.terminate()
-            except psutil.AccessDenied:
-                continue
+from src.processes import REGISTRY
 
 
 def get_app(title: str, backend: str = 'win32') -> Application:
@@ -30,30 +19,17 @@ def get_app(title: str, backend: str = 'win32') -> Application:
     return app
 
 
-def choose_mode(mode: str, app: Application | None = None) -> None:
-    if not app:
-        app = Application(backend='win32').connect(path=PROCESS_PATH)
-    mode_win = app.window(title='Выбор режима')
-    mode_win['Edit2'].set_text(text=mode)
-    mode_win['Edit2'].send_keystrokes('~')
-
-
-def get_window(title: str, app: Optional[Application] = None, wait_for: str = 'exists', timeout: int = 20,
-               regex: bool = False, found_index: int = 0) -> WindowSpecification:
-    if not app:
-        app = Application(backend='win32').connect(path=PROCESS_PATH)
-    window = app.window(title=title, found_index=found_index) \
-        if not regex else app.window(title_re=title, found_index=found_index)
-    window.wait(wait_for=wait_for, timeout=timeout)
-    sleep(.5)
-    return window
-
-
 @contextmanager
 def dispatch(application: str) -> None:
-    app = win32.Dispatch(application)
+    # DispatchEx starts a separate instance instead of attaching to an Excel another robot may be using
+    app = win32.DispatchEx(application)
     app.DisplayAlerts = False
+    _, pid = win32process.GetWindowThreadProcessId(app.Hwnd)
+    REGISTRY.register(pid=pid)
     try:
         yield app
     finally:
-        kill_all_processes(proc_name='EXCEL')
+        try:
+            app.Quit()
+        finally:
+            REGISTRY.reap(pids=[pid])
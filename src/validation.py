@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from os.path import exists, join
+from typing import Any, Iterable, Iterator, Optional
+
+from src.logger import logger
+
+ROW_COUNTS_FILE_NAME = 'row_counts.json'
+# Reports are parsed in parallel, each one updates its own count in the shared file
+ROW_COUNTS_LOCK = threading.Lock()
+
+
+class ValidationError(ValueError):
+    pass
+
+
+@dataclass
+class ReportSchema:
+    headers: list[str] = field(default_factory=list)
+    required_columns: list[str] = field(default_factory=list)
+    full_branch_coverage: bool = False
+    max_row_count_change: float = .5
+
+
+@dataclass
+class ReportValidator:
+    report_name: str
+    schema: ReportSchema
+    expected_branches: set[str]
+    previous_row_count: Optional[int] = None
+    branch_counts: Counter = field(default_factory=Counter)
+    warnings: list[str] = field(default_factory=list)
+
+    @property
+    def row_count(self) -> int:
+        return sum(self.branch_counts.values())
+
+    def check_headers(self, headers: list[str]) -> None:
+        if not headers:
+            raise ValidationError(f'{self.report_name}: no headers found')
+        missing_headers = [header for header in self.schema.headers if header not in headers]
+        if missing_headers:
+            raise ValidationError(f'{self.report_name}: missing headers {missing_headers}, found {headers}')
+
+    def watch(self, indexed_rows: Iterable[tuple[int, dict[str, Any]]]) -> Iterator[dict[str, Any]]:
+        required_columns = self.schema.required_columns
+        branch_counts = self.branch_counts
+        for row_idx, row in indexed_rows:
+            for column in required_columns:
+                value = row.get(column)
+                if value is None or (type(value) is str and not value.strip()):
+                    raise ValidationError(f'{self.report_name}: empty {column} in sheet row {row_idx}: {row}')
+            branch_counts[row['Филиал']] += 1
+            yield row
+
+    def finish(self) -> list[str]:
+        if self.row_count == 0:
+            raise ValidationError(f'{self.report_name}: no data rows')
+
+        unknown_branches = set(self.branch_counts) - self.expected_branches
+        if unknown_branches:
+            self.warnings.append(f'{self.report_name}: unexpected branches {sorted(unknown_branches)}')
+        if self.schema.full_branch_coverage:
+            missing_branches = self.expected_branches - set(self.branch_counts)
+            if missing_branches:
+                self.warnings.append(f'{self.report_name}: no rows for branches {sorted(missing_branches)}')
+
+        if self.previous_row_count:
+            change = abs(self.row_count - self.previous_row_count) / self.previous_row_count
+            if change > self.schema.max_row_count_change:
+                self.warnings.append(f'{self.report_name}: {self.row_count} rows, '
+                                     f'{self.previous_row_count} in the previous quarter')
+
+        for warning in self.warnings:
+            logger.warning(warning)
+        return self.warnings
+
+
+def read_row_counts(json_folder: str) -> dict[str, int]:
+    file_path = join(json_folder, ROW_COUNTS_FILE_NAME)
+    if not exists(file_path):
+        return {}
+    with open(file_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_row_count(json_folder: str, report_name: str, row_count: int) -> None:
+    with ROW_COUNTS_LOCK:
+        row_counts = read_row_counts(json_folder=json_folder)
+        row_counts[report_name] = row_count
+        fd, tmp_file_path = tempfile.mkstemp(dir=json_folder, prefix=f'{ROW_COUNTS_FILE_NAME}.', suffix='.tmp')
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump(row_counts, f, ensure_ascii=False, indent=4)
+            os.replace(tmp_file_path, join(json_folder, ROW_COUNTS_FILE_NAME))
+        except BaseException:
+            os.remove(tmp_file_path)
+            raise
@@ -0,0 +1,195 @@
+import atexit
+import heapq
+import itertools
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from os.path import basename
+from time import monotonic
+from typing import Any, Callable, Optional
+
+from src.automation import Report
+from src.logger import logger
+
+VALIDATION_WORKERS = 2
+MIN_INTERVAL = .5
+MAX_INTERVAL = 30.
+VALIDATE_TIMEOUT = 60. * 60.
+# Share of the time the file has already taken to write that passes before the next probe
+GROWTH_FACTOR = .25
+
+EXCEL = None
+
+
+class ExportError(Exception):
+    pass
+
+
+def init_worker() -> None:
+    # Every worker process converts with its own Excel, quit when the worker exits
+    global EXCEL
+    import pythoncom
+
+    from src import utils
+
+    pythoncom.CoInitialize()
+    stack = ExitStack()
+    EXCEL = stack.enter_context(utils.dispatch(application='Excel.Application'))
+    atexit.register(stack.close)
+
+
+def validate_export(file_path: str) -> bool:
+    from src.colvir import is_correct_file
+
+    return is_correct_file(excel_full_file_path=file_path, excel=EXCEL)
+
+
+@dataclass(order=True)
+class Watch:
+    next_probe: float
+    seq: int
+    report: Report = field(compare=False)
+    future: Future = field(compare=False)
+    started: float = field(compare=False)
+    interval: float = field(compare=False)
+    size: int = field(default=-1, compare=False)
+    probed_at: float = field(default=0., compare=False)
+
+
+def is_unlocked(file_path: str) -> bool:
+    # Colvir keeps the file open while writing, renaming it onto itself fails until then
+    try:
+        os.rename(src=file_path, dst=file_path)
+    except OSError:
+        return False
+    return True
+
+
+class ValidationPool:
+    def __init__(self, workers: int = VALIDATION_WORKERS, validate: Callable[[str], bool] = validate_export,
+                 initializer: Optional[Callable[[], None]] = init_worker,
+                 executor: Optional[Executor] = None, min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL, timeout: float = VALIDATE_TIMEOUT,
+                 is_ready: Callable[[str], bool] = is_unlocked) -> None:
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+        self.validate = validate
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self.is_ready = is_ready
+        self.watches: list[Watch] = []
+        self.seq = itertools.count()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self.loop, name='validation-pool', daemon=True)
+        self.thread.start()
+
+    def __enter__(self) -> 'ValidationPool':
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def submit(self, report: Report) -> Future:
+        future = Future()
+        now = monotonic()
+        with self.condition:
+            heapq.heappush(self.watches, Watch(next_probe=now, seq=next(self.seq), report=report, future=future,
+                                               started=now, interval=self.min_interval))
+            self.condition.notify()
+        return future
+
+    def wait_until_valid(self, report: Report) -> bool:
+        return self.submit(report=report).result()
+
+    def close(self) -> None:
+        with self.condition:
+            self.closed = True
+            for watch in self.watches:
+                watch.future.cancel()
+            self.watches.clear()
+            self.condition.notify()
+        self.thread.join()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def loop(self) -> None:
+        while True:
+            with self.condition:
+                while not self.closed and (not self.watches or self.watches[0].next_probe > monotonic()):
+                    self.condition.wait(timeout=self.watches[0].next_probe - monotonic() if self.watches else None)
+                if self.closed:
+                    return
+                watch = heapq.heappop(self.watches)
+            try:
+                self.probe(watch=watch)
+            except Exception as error:
+                # One unreadable file must not stop the loop that serves the others
+                watch.future.set_exception(error)
+
+    def schedule(self, watch: Watch, interval: float) -> None:
+        watch.interval = min(max(interval, self.min_interval), self.max_interval)
+        watch.next_probe = monotonic() + watch.interval
+        with self.condition:
+            heapq.heappush(self.watches, watch)
+
+    def probe(self, watch: Watch) -> None:
+        file_path = watch.report.file_path
+        now = monotonic()
+        if now - watch.started > self.timeout:
+            watch.future.set_exception(TimeoutError(f'{file_path} was not exported in {self.timeout:.0f} s'))
+            return
+
+        try:
+            size = os.stat(file_path).st_size
+        except FileNotFoundError:
+            size = 0
+        if size == 0:
+            # Not started yet: back off, the export itself takes a while
+            self.schedule(watch=watch, interval=watch.interval * 2)
+            return
+
+        if size != watch.size:
+            # Still growing: a file that has been written for long is far from done, probe it less often
+            if watch.size > 0:
+                rate = (size - watch.size) / (now - watch.probed_at)
+                interval = GROWTH_FACTOR * size / rate if rate > 0 else self.min_interval
+            else:
+                interval = self.min_interval
+            watch.size, watch.probed_at = size, now
+            self.schedule(watch=watch, interval=interval)
+            return
+
+        if not self.is_ready(file_path):
+            self.schedule(watch=watch, interval=self.min_interval)
+            return
+
+        logger.info(f'{basename(file_path)} exported ({size} bytes), validating')
+        try:
+            result = self.executor.submit(self.validate, file_path)
+        except RuntimeError as error:
+            watch.future.set_exception(error)
+            return
+        result.add_done_callback(lambda result: self.finish(watch=watch, result=result))
+
+    def finish(self, watch: Watch, result: Future) -> None:
+        report = watch.report
+        # The session has written its file either way, it is freed for the next export right away
+        try:
+            if report.app is not None:
+                report.app.kill()
+        except Exception as error:
+            logger.error(f'Could not kill the session of {basename(report.file_path)}: {error!r}')
+        finally:
+            report.app = None
+
+        if result.cancelled():
+            watch.future.cancel()
+        elif (error := result.exception()) is not None:
+            watch.future.set_exception(error)
+        elif not result.result():
+            watch.future.set_exception(ExportError(f'{report.file_path} is not a correct export'))
+        else:
+            logger.info(f'{basename(report.file_path)} validated in {monotonic() - watch.started:.1f} s')
+            watch.future.set_result(True)
@@ -0,0 +1,4 @@
+import os
+
+# src.config builds the Telegram bot at import time
+os.environ.setdefault('TOKEN', 'test')
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from src.automation import Automation, build_reports
+from src.config import Credentials
+from src.fake_colvir import ElementNotFoundError, FakeColvir, Script, WaitTimeoutError
+
+
+def make_automation(colvir: FakeColvir) -> Automation:
+    script = colvir.script
+    return Automation(start=colvir.start, not_found_error=ElementNotFoundError,
+                      retry_errors=(ElementNotFoundError, WaitTimeoutError), process_path='COLVIR.EXE',
+                      credentials=Credentials(user='robot', password='robot'), settle_time=0., poll_interval=.01,
+                      window_timeout=script.find_timeout, confirm_timeout=script.find_timeout)
+
+
+def test_export_writes_every_report(tmp_path):
+    colvir = FakeColvir(script=Script(default_latency=.01, export_time=.05, file_size=1000, find_timeout=1.,
+                                      exists_timeout=.1))
+    automation = make_automation(colvir=colvir)
+    reports = build_reports(branches=['18', '19'], reports_folder=str(tmp_path),
+                            date_ranges=('01.07.2026', '30.09.2026'))
+    for report in reports:
+        automation.export(report=report)
+    colvir.join()
+
+    assert all(os.path.getsize(report.file_path) == 1000 for report in reports)
+    assert all(report.app is not None and not report.app.killed for report in reports)
+
+
+def test_export_gives_up_after_the_last_try(tmp_path):
+    colvir = FakeColvir(script=Script(default_latency=.01, failure_rates={'Выбор отчета': 1.}, find_timeout=.1,
+                                      exists_timeout=.05))
+    automation = make_automation(colvir=colvir)
+    report = build_reports(branches=[], reports_folder=str(tmp_path), date_ranges=('01.07.2026', '30.09.2026'))[0]
+
+    with pytest.raises(WaitTimeoutError):
+        automation.export(report=report, max_tries=3)
+    assert colvir.failures['Выбор отчета'] == 3
+    assert all(app.killed for app in colvir.apps)
+    assert report.app is None
@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from src.key_store import load_key_store
+
+
+def make_key(base_path, branch: str, password: str = 'secret', *file_names: str) -> None:
+    folder = base_path / branch / password
+    os.makedirs(folder)
+    for file_name in file_names or ('AUTH_RSA.p12',):
+        (folder / file_name).write_bytes(b'key')
+
+
+@pytest.fixture
+def base_path(tmp_path):
+    base_path = tmp_path / 'keys'
+    make_key(base_path, '18', 'p18')
+    make_key(base_path, '19', 'p19', 'AUTH_RSA.p12', 'GOST512.p12')
+    make_key(base_path, '20', 'p20', 'GOST512_1.p12', 'GOST512_2.p12')
+    os.makedirs(base_path / '21' / 'a')
+    os.makedirs(base_path / '21' / 'b')
+    os.makedirs(base_path / '22' / 'p22')
+    return base_path
+
+
+def test_load_key_store(base_path, tmp_path):
+    key_store = load_key_store(base_path=str(base_path), branches=['18', '19', '20', '21', '22', '23'],
+                               manifest_path=str(tmp_path / 'manifest.json'))
+
+    assert sorted(key_store.keys) == ['18', '19']
+    assert key_store.resolve('18').password == 'p18'
+    assert os.path.basename(key_store.resolve('19').path) == 'AUTH_RSA.p12'
+    assert 'Several key files' in key_store.problems['20']
+    assert 'Several password folders' in key_store.problems['21']
+    assert 'No key file' in key_store.problems['22']
+    assert 'No key folder' in key_store.problems['23']
+    with pytest.raises(KeyError, match='No key folder'):
+        key_store.resolve('23')
+
+
+def test_cached_key_is_reused(base_path, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    first = load_key_store(base_path=str(base_path), branches=['18'], manifest_path=manifest_path)
+    second = load_key_store(base_path=str(base_path), branches=['18'], manifest_path=manifest_path)
+    assert second.resolve('18') == first.resolve('18')
+
+
+def test_swapped_key_file_is_rescanned(base_path, tmp_path):
+    manifest_path = str(tmp_path / 'manifest.json')
+    load_key_store(base_path=str(base_path), branches=['18'], manifest_path=manifest_path)
+
+    # Renaming inside the password folder leaves the branch folder mtime as it was
+    folder = base_path / '18' / 'p18'
+    os.rename(folder / 'AUTH_RSA.p12', folder / 'AUTH_RSA_2026.p12')
+    key_store = load_key_store(base_path=str(base_path), branches=['18'], manifest_path=manifest_path)
+    assert os.path.basename(key_store.resolve('18').path) == 'AUTH_RSA_2026.p12'
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import pytest
+
+from src.numeric import VECTORIZE_THRESHOLD, NumericError, to_float, to_float_column
+
+VALUES = [1, 2.5, True, None, '1 234,5', '1\xa0000', '', 'н/д', datetime(2026, 9, 30), '-7,25']
+
+
+def test_to_float():
+    assert to_float('1 234 567,89') == 1234567.89
+    assert to_float(None, default=-1.) == -1.
+    with pytest.raises(NumericError):
+        to_float('abc', strict=True)
+
+
+@pytest.mark.parametrize('size', [len(VALUES), VECTORIZE_THRESHOLD * 2])
+def test_column_paths_agree(size):
+    values = (VALUES * (size // len(VALUES) + 1))[:size]
+    numbers, issues = to_float_column(values=values)
+
+    expected_numbers, expected_issues = [], []
+    for index, value in enumerate(values):
+        try:
+            expected_numbers.append(to_float(value, strict=True))
+        except NumericError:
+            expected_numbers.append(0.)
+            expected_issues.append(index)
+    assert numbers == expected_numbers
+    assert [issue.index for issue in issues] == expected_issues
+
+
+def test_strict_column_raises():
+    with pytest.raises(NumericError, match='н/д'):
+        to_float_column(values=VALUES, strict=True)
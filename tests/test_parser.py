@@ -0,0 +1,120 @@
+import os
+
+import openpyxl
+import pytest
+
+from src import parser, synthetic
+from src.config import BRANCH_MAPPINGS
+from src.json_lines import read_rows
+from src.validation import ValidationError
+
+BRANCHES = [branch_mapping['branch'] for branch_mapping in BRANCH_MAPPINGS]
+
+
+def get_employee_rows(sheet, report: parser.Report) -> list[int]:
+    # Employee rows are the ones with a personnel number next to the name, branch and total rows have none
+    return [row_idx for row_idx in range(report.data_idx, sheet.max_row + 1) if sheet.cell(row=row_idx, column=2).value]
+
+
+def parse(report_name: str, rows: int, tmp_path, branches=None) -> int:
+    synthetic.generate_report(report_name=report_name, rows=rows, folder=str(tmp_path), branches=branches)
+    return parser.parse_report(report=parser.get_report(report_name=report_name), reports_folder=str(tmp_path),
+                               json_folder=str(tmp_path / 'json'), prev_json_folder=None)
+
+
+@pytest.fixture
+def json_folder(tmp_path):
+    os.makedirs(tmp_path / 'json')
+    return tmp_path / 'json'
+
+
+@pytest.mark.parametrize('report_name', ['Z_160_HREMPLOYTAKETOWORK_00', 'Z_160_SHTAT_RASTANOVKA_V_00',
+                                         'Z_160_DISEMPLOYEE_00', 'Z_160_PR_FORMOBWVEDZP_18'])
+def test_parse_report_writes_every_row(tmp_path, json_folder, report_name):
+    assert parse(report_name=report_name, rows=300, tmp_path=tmp_path) == 300
+    report = parser.get_report(report_name=report_name)
+    assert len(list(read_rows(parser.get_json_path(report=report, json_folder=str(json_folder))))) == 300
+
+
+@pytest.mark.parametrize('report_name', parser.REPORT_NAMES)
+def test_read_only_sheet_matches_loaded_sheet(tmp_path, report_name):
+    file_path = synthetic.generate_report(report_name=report_name, rows=300, folder=str(tmp_path))
+    report = parser.get_report(report_name=report_name)
+    loaded = openpyxl.load_workbook(file_path).active
+    read_only_workbook = openpyxl.load_workbook(file_path, read_only=True)
+    try:
+        read_only = read_only_workbook.active
+        assert parser.get_merged_rows(sheet=read_only) == parser.get_merged_rows(sheet=loaded)
+        assert parser.parse_headers(sheet=read_only, headers_idx=report.headers_idx,
+                                    subheaders_exist=report.subheaders_exist) == \
+            parser.parse_headers(sheet=loaded, headers_idx=report.headers_idx,
+                                 subheaders_exist=report.subheaders_exist)
+    finally:
+        read_only_workbook.close()
+
+
+def test_split_report_writes_branch_files(tmp_path, json_folder):
+    parse(report_name='Z_160_PR_FORMOBWVEDZP_00', rows=500, tmp_path=tmp_path)
+    report = parser.get_report(report_name='Z_160_PR_FORMOBWVEDZP_00')
+
+    row_count = 0
+    for branch in BRANCHES:
+        rows = list(read_rows(parser.get_branch_json_path(report=report, branch=branch,
+                                                          json_folder=str(json_folder))))
+        assert {row['Филиал'] for row in rows} == {branch}
+        row_count += len(rows)
+    assert row_count == 500
+
+
+def test_split_report_removes_stale_branch_files(tmp_path, json_folder):
+    parse(report_name='Z_160_PR_FORMOBWVEDZP_00', rows=500, tmp_path=tmp_path)
+    parse(report_name='Z_160_PR_FORMOBWVEDZP_00', rows=500, tmp_path=tmp_path, branches=BRANCHES[:2])
+
+    report = parser.get_report(report_name='Z_160_PR_FORMOBWVEDZP_00')
+    written = {branch for branch in BRANCHES
+               if os.path.exists(parser.get_branch_json_path(report=report, branch=branch,
+                                                             json_folder=str(json_folder)))}
+    assert written == set(BRANCHES[:2])
+
+
+def test_split_report_skips_sub_headers(tmp_path):
+    report = parser.get_report(report_name='Z_160_PR_FORMOBWVEDZP_00')
+    file_path = synthetic.generate_report(report_name=report.report_name, rows=300, folder=str(tmp_path),
+                                          branches=BRANCHES[:2])
+    workbook = openpyxl.load_workbook(file_path)
+    sheet = workbook.active
+    expected = {row_idx: row['Филиал'] for row_idx, row in report.parse_rows(
+        sheet=sheet, data_idx=report.data_idx,
+        headers=parser.parse_headers(sheet=sheet, headers_idx=report.headers_idx))}
+
+    # A department sub-header and a row with only a number in column A replace two employee rows
+    employee_rows = get_employee_rows(sheet=sheet, report=report)
+    for row_idx, value in ((employee_rows[10], ' Бухгалтерия'), (employee_rows[200], 42)):
+        for column in range(1, sheet.max_column + 1):
+            sheet.cell(row=row_idx, column=column).value = None
+        sheet.cell(row=row_idx, column=1).value = value
+        del expected[row_idx]
+    workbook.save(file_path)
+
+    rows = list(parser.iter_report_rows(report=report, reports_folder=str(tmp_path)))
+    assert [row['Филиал'] for row in rows] == list(expected.values())
+
+
+def test_invalid_row_keeps_previous_output(tmp_path, json_folder):
+    report_name = 'Z_160_PR_FORMOBWVEDZP_00'
+    parse(report_name=report_name, rows=300, tmp_path=tmp_path)
+    before = {file_name: os.path.getmtime(json_folder / file_name) for file_name in os.listdir(json_folder)}
+
+    report = parser.get_report(report_name=report_name)
+    file_path = synthetic.generate_report(report_name=report_name, rows=300, folder=str(tmp_path))
+    workbook = openpyxl.load_workbook(file_path)
+    sheet = workbook.active
+    row_idx = get_employee_rows(sheet=sheet, report=report)[150]
+    sheet.cell(row=row_idx, column=1).value = None
+    workbook.save(file_path)
+
+    with pytest.raises(ValidationError, match=f'sheet row {row_idx}'):
+        parser.parse_report(report=report, reports_folder=str(tmp_path), json_folder=str(json_folder),
+                            prev_json_folder=None)
+    # Neither the published files nor temporary ones are left behind
+    assert {file_name: os.path.getmtime(json_folder / file_name) for file_name in os.listdir(json_folder)} == before
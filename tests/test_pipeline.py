@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from src.pipeline import Scheduler, Task
+
+STAGE_LIMITS = {'export': 1, 'parse': 2}
+
+
+def test_run_respects_dependencies():
+    order = []
+    lock = threading.Lock()
+
+    def record(name: str):
+        def func():
+            with lock:
+                order.append(name)
+            return name
+        return func
+
+    scheduler = Scheduler(stage_limits=STAGE_LIMITS)
+    scheduler.add(Task(name='export', stage='export', func=record('export')))
+    scheduler.add(Task(name='parse:a', stage='parse', func=record('parse:a'), deps=['export']))
+    scheduler.add(Task(name='parse:b', stage='parse', func=record('parse:b'), deps=['export']))
+    tasks = scheduler.run()
+
+    assert order[0] == 'export'
+    assert sorted(order[1:]) == ['parse:a', 'parse:b']
+    assert all(task.done and task.error is None and task.result == name for name, task in tasks.items())
+
+
+def test_failed_task_skips_dependents():
+    def fail():
+        raise RuntimeError('export failed')
+
+    scheduler = Scheduler(stage_limits=STAGE_LIMITS)
+    scheduler.add(Task(name='export:a', stage='export', func=fail))
+    scheduler.add(Task(name='export:b', stage='export', func=lambda: 'b'))
+    scheduler.add(Task(name='parse:a', stage='parse', func=lambda: 'a', deps=['export:a']))
+    scheduler.add(Task(name='parse:aa', stage='parse', func=lambda: 'aa', deps=['parse:a']))
+    scheduler.add(Task(name='parse:b', stage='parse', func=lambda: 'b', deps=['export:b']))
+    tasks = scheduler.run()
+
+    assert isinstance(tasks['export:a'].error, RuntimeError)
+    assert tasks['parse:a'].error is tasks['export:a'].error
+    assert tasks['parse:aa'].error is tasks['export:a'].error
+    assert tasks['parse:a'].result is None
+    assert tasks['parse:b'].result == 'b'
+
+
+def test_cycle_is_rejected():
+    scheduler = Scheduler(stage_limits=STAGE_LIMITS)
+    scheduler.add(Task(name='a', stage='parse', func=lambda: None, deps=['b']))
+    scheduler.add(Task(name='b', stage='parse', func=lambda: None, deps=['a']))
+    with pytest.raises(ValueError, match='cycle'):
+        scheduler.run()
+
+
+def test_unknown_dependency_and_stage_are_rejected():
+    scheduler = Scheduler(stage_limits=STAGE_LIMITS)
+    scheduler.add(Task(name='a', stage='parse', func=lambda: None, deps=['missing']))
+    with pytest.raises(ValueError, match='Unknown dependency'):
+        scheduler.run()
+
+    scheduler = Scheduler(stage_limits=STAGE_LIMITS)
+    scheduler.add(Task(name='a', stage='upload', func=lambda: None))
+    with pytest.raises(ValueError, match='Unknown stage'):
+        scheduler.run()
+
+
+def test_duplicate_task_is_rejected():
+    scheduler = Scheduler(stage_limits=STAGE_LIMITS)
+    scheduler.add(Task(name='a', stage='parse', func=lambda: None))
+    with pytest.raises(ValueError, match='Duplicate'):
+        scheduler.add(Task(name='a', stage='parse', func=lambda: None))
@@ -0,0 +1,48 @@
+from time import sleep
+
+from src.config import Credentials
+from src.key_store import EdsKey, KeyStore
+from src.preflight import Check, get_checks, run_preflight
+
+CREDENTIALS = Credentials(user='robot', password='secret')
+
+
+def load(base_path: str) -> KeyStore:
+    return KeyStore(keys={'18': EdsKey(branch='18', password='p18', path=f'{base_path}/18/p18/AUTH_RSA.p12')},
+                    problems={'19': 'No key folder'})
+
+
+def unreachable(base_path: str) -> KeyStore:
+    raise OSError('network path not found')
+
+
+def install() -> str:
+    return '/drivers/chromedriver'
+
+
+def get_results(**kwargs) -> dict[str, tuple[bool, str]]:
+    kwargs = {'credentials': CREDENTIALS, 'process_path': 'COLVIR.EXE', 'base_path': '/keys', 'load': load,
+              'install': install, 'is_file': lambda path: True, **kwargs}
+    return {result.name: (result.ok, result.detail) for result in run_preflight(checks=get_checks(**kwargs))}
+
+
+def test_all_checks_pass():
+    results = get_results()
+    assert all(ok for ok, _ in results.values())
+    assert results['eds keys'][1] == "1 keys, problems: ['19']"
+
+
+def test_failed_checks_are_reported():
+    results = get_results(credentials=Credentials(user='robot', password=None), load=unreachable,
+                          is_file=lambda path: False)
+    assert results['credentials'] == (False, 'COLVIR_PSW not set')
+    assert results['colvir'] == (False, 'COLVIR.EXE not found')
+    assert results['eds keys'][0] is False and 'unreachable' in results['eds keys'][1]
+    assert results['chromedriver'] == (False, 'ChromeDriver not found at /drivers/chromedriver')
+
+
+def test_hung_check_is_abandoned():
+    results = run_preflight(checks=[Check(name='hang', func=lambda: sleep(60)), Check(name='ok', func=lambda: 'ok')],
+                            timeout=.2)
+    assert [(result.name, result.ok) for result in results] == [('hang', False), ('ok', True)]
+    assert results[0].elapsed < 5
@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+from dataclasses import asdict
+
+import pytest
+
+from src.processes import ProcessRegistry, get_tracked_process, sweep
+
+
+@pytest.fixture
+def spawn():
+    processes = []
+
+    def start() -> subprocess.Popen:
+        processes.append(process := subprocess.Popen(['sleep', '60']))
+        return process
+
+    yield start
+    for process in processes:
+        process.kill()
+        process.wait()
+
+
+def is_running(process: subprocess.Popen) -> bool:
+    try:
+        process.wait(timeout=.5)
+    except subprocess.TimeoutExpired:
+        return True
+    return False
+
+
+def test_close_reaps_registered_processes(tmp_path, spawn):
+    child = spawn()
+    registry = ProcessRegistry(pids_folder=str(tmp_path))
+    registry.register(pid=child.pid)
+    with open(registry.file_path, encoding='utf-8') as f:
+        assert [tracked['pid'] for tracked in json.load(f)['processes']] == [child.pid]
+
+    registry.close()
+    assert not is_running(child)
+    assert not os.path.exists(registry.file_path)
+
+
+def test_sweep_skips_live_owner(tmp_path, spawn):
+    child = spawn()
+    registry = ProcessRegistry(pids_folder=str(tmp_path))
+    registry.register(pid=child.pid)
+
+    assert sweep(pids_folder=str(tmp_path), timeout=1.) == 0
+    assert is_running(child)
+    assert os.path.exists(registry.file_path)
+
+
+def test_sweep_reaps_processes_of_dead_owner(tmp_path, spawn):
+    owner, child = spawn(), spawn()
+    registry = ProcessRegistry(pids_folder=str(tmp_path), owner_pid=owner.pid)
+    registry.register(pid=child.pid)
+    owner.kill()
+    owner.wait()
+
+    assert sweep(pids_folder=str(tmp_path), timeout=1.) == 1
+    assert not is_running(child)
+    assert not os.listdir(tmp_path)
+
+
+def test_sweep_spares_reused_pid(tmp_path, spawn):
+    owner, child = spawn(), spawn()
+    owner_tracked = get_tracked_process(pid=owner.pid)
+    owner.kill()
+    owner.wait()
+
+    # The PID now belongs to a process started at another time
+    tracked = get_tracked_process(pid=child.pid)
+    tracked.create_time -= 100
+    with open(tmp_path / f'{owner_tracked.pid}.json', 'w', encoding='utf-8') as f:
+        json.dump({'owner': asdict(owner_tracked), 'processes': [asdict(tracked)]}, f)
+
+    assert sweep(pids_folder=str(tmp_path), timeout=1.) == 0
+    assert is_running(child)
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,60 @@
+from src.snapshot import MESSAGE_LIMIT, Change, format_changes, load_snapshot, save_snapshot, update_snapshot
+
+
+class Bot:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.messages = []
+
+    async def send_messages(self, messages: list[str]) -> None:
+        if self.fail:
+            raise ConnectionError('Telegram is unreachable')
+        self.messages.extend(messages)
+
+
+def test_compares_with_previous_quarter(tmp_path):
+    file_path, fallback_file_path = str(tmp_path / '2026_3.json'), str(tmp_path / '2026_2.json')
+    save_snapshot(file_path=fallback_file_path, snapshot={'18': {'Численность': 10, 'ФОТ, тыс. тенге': 500.}})
+    save_snapshot(file_path=file_path, snapshot={'18': {'Численность': 12}})
+
+    bot = Bot()
+    changes = update_snapshot(snapshot={'18': {'Численность': 12, 'ФОТ, тыс. тенге': 550.}}, file_path=file_path,
+                              fallback_file_path=fallback_file_path, bot=bot)
+
+    assert changes == [Change(branch='18', indicator='ФОТ, тыс. тенге', old=500., new=550.)]
+    assert bot.messages == ['Филиал 18:\n  ФОТ, тыс. тенге: 500.0 → 550.0']
+    assert load_snapshot(file_path=file_path) == {'18': {'Численность': 12, 'ФОТ, тыс. тенге': 550.}}
+
+
+def test_nothing_changed_sends_nothing(tmp_path):
+    file_path = str(tmp_path / '2026_3.json')
+    save_snapshot(file_path=file_path, snapshot={'18': {'Численность': 12}})
+
+    bot = Bot()
+    assert update_snapshot(snapshot={'18': {'Численность': 12}}, file_path=file_path, fallback_file_path=None,
+                           bot=bot) == []
+    assert bot.messages == []
+
+
+def test_failed_send_keeps_snapshot(tmp_path):
+    file_path = str(tmp_path / '2026_3.json')
+    save_snapshot(file_path=file_path, snapshot={'18': {'Численность': 12}})
+
+    changes = update_snapshot(snapshot={'18': {'Численность': 13}}, file_path=file_path, fallback_file_path=None,
+                              bot=Bot(fail=True))
+    assert len(changes) == 1
+    assert load_snapshot(file_path=file_path) == {'18': {'Численность': 12}}
+
+    # The next run reports the same change again
+    bot = Bot()
+    assert update_snapshot(snapshot={'18': {'Численность': 13}}, file_path=file_path, fallback_file_path=None,
+                           bot=bot) == changes
+    assert load_snapshot(file_path=file_path) == {'18': {'Численность': 13}}
+
+
+def test_messages_stay_under_limit():
+    changes = [Change(branch=f'{branch:02}', indicator='Численность', old=index, new=index + 1)
+               for branch in range(20) for index in range(100)]
+    messages = format_changes(changes=changes)
+    assert len(messages) > 1
+    assert all(len(message) <= MESSAGE_LIMIT for message in messages)
@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.validation import ReportSchema, ReportValidator, ValidationError, read_row_counts, write_row_count
+
+
+def test_parallel_row_counts_are_all_kept(tmp_path):
+    def write(index: int) -> None:
+        write_row_count(json_folder=str(tmp_path), report_name=f'report_{index % 8}', row_count=index)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(write, range(400)))
+
+    assert sorted(read_row_counts(json_folder=str(tmp_path))) == [f'report_{index}' for index in range(8)]
+    assert [path.name for path in tmp_path.iterdir()] == ['row_counts.json']
+
+
+def test_validator_reports_sheet_row():
+    validator = ReportValidator(report_name='Z_160_PR_FORMOBWVEDZP_00',
+                                schema=ReportSchema(headers=['Сотрудник'], required_columns=['Сотрудник']),
+                                expected_branches={'18', '19'})
+    with pytest.raises(ValidationError, match='missing headers'):
+        validator.check_headers(headers=['Состояние'])
+
+    rows = [(5, {'Филиал': '18', 'Сотрудник': 'Иванов'}), (7, {'Филиал': '18', 'Сотрудник': ' '})]
+    with pytest.raises(ValidationError, match='sheet row 7'):
+        list(validator.watch(indexed_rows=rows))
+    assert validator.row_count == 1
@@ -0,0 +1,71 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.automation import Report
+from src.validation_pool import ExportError, ValidationPool
+
+
+class App:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.killed = False
+
+    def kill(self) -> None:
+        self.killed = True
+        if self.fail:
+            raise OSError('access denied')
+
+
+def make_report(tmp_path, app: App, size: int = 1024) -> Report:
+    file_path = tmp_path / 'Z_160_DISEMPLOYEE_00.xls'
+    if size:
+        file_path.write_bytes(b'\0' * size)
+    return Report(mode='PRS', code='Z_160_DISEMPLOYEE', branch='00', file_path=str(file_path),
+                  date_ranges=('01.07.2026', '30.09.2026'), app=app)
+
+
+def make_pool(validate=lambda file_path: True, timeout: float = 5.) -> ValidationPool:
+    return ValidationPool(validate=validate, executor=ThreadPoolExecutor(max_workers=1), min_interval=.01,
+                          max_interval=.05, timeout=timeout, is_ready=lambda file_path: True)
+
+
+def test_valid_export_kills_the_session(tmp_path):
+    app = App()
+    report = make_report(tmp_path, app=app)
+    with make_pool() as pool:
+        assert pool.submit(report=report).result(timeout=5) is True
+    assert app.killed
+    assert report.app is None
+
+
+def test_invalid_export_fails(tmp_path):
+    report = make_report(tmp_path, app=App())
+    with make_pool(validate=lambda file_path: False) as pool:
+        with pytest.raises(ExportError):
+            pool.submit(report=report).result(timeout=5)
+
+
+def test_failed_kill_still_resolves(tmp_path):
+    app = App(fail=True)
+    report = make_report(tmp_path, app=app)
+    with make_pool() as pool:
+        assert pool.submit(report=report).result(timeout=5) is True
+    assert report.app is None
+
+
+def test_validation_error_is_passed_on(tmp_path):
+    def validate(file_path: str) -> bool:
+        raise RuntimeError('Excel crashed')
+
+    report = make_report(tmp_path, app=App())
+    with make_pool(validate=validate) as pool:
+        with pytest.raises(RuntimeError, match='Excel crashed'):
+            pool.submit(report=report).result(timeout=5)
+
+
+def test_missing_export_times_out(tmp_path):
+    report = make_report(tmp_path, app=App(), size=0)
+    with make_pool(timeout=.1) as pool:
+        with pytest.raises(TimeoutError):
+            pool.submit(report=report).result(timeout=5)